@@ -19,6 +19,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "app"))
 
 from ai.central_brain import CentralAIBrain
+from ai.ollama_client import install_uvloop
 
 # Configure logging
 logging.basicConfig(
@@ -281,5 +282,6 @@ async def main():
 
 if __name__ == "__main__":
     print("🧠 Starting CelFlow Central AI Brain Demo...")
+    install_uvloop()
     exit_code = asyncio.run(main())
     sys.exit(exit_code)
@@ -327,7 +327,7 @@ class AdvancedContextManager:
         context_parts = [
             "PATTERN_ANALYSIS_REQUEST",
             f"TOTAL_EXCHANGES: {len(exchanges)}",
-            f"TIME_RANGE: {exchanges[0].timestamp.isoformat()} to {exchanges[-1].timestamp.isoformat()}",
+            f"TIME_RANGE: {exchanges[0].timestamp_iso} to {exchanges[-1].timestamp_iso}",
             "",
         ]
 
@@ -336,7 +336,7 @@ class AdvancedContextManager:
             context_parts.extend(
                 [
                     f"EXCHANGE_{i+1}:",
-                    f"  Time: {exchange.timestamp.isoformat()}",
+                    f"  Time: {exchange.timestamp_iso}",
                     f"  Type: {exchange.context_type}",
                     f"  User: {exchange.user_message[:100]}...",
                     f"  Assistant: {exchange.assistant_response[:100]}...",
@@ -3,9 +3,10 @@ CelFlow Central AI Brain - Core Orchestrating Intelligence
 The main brain that coordinates all AI capabilities and system interactions
 """
 
+import asyncio
 import logging
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from datetime import datetime
 
 from .ollama_client import OllamaClient
@@ -38,10 +39,39 @@ from ..core.enhanced_logging import central_brain_logger, lambda_logger
 
 logger = logging.getLogger(__name__)
 
+_BASE_SYSTEM_PROMPT = """You are the Central AI Brain of CelFlow, a self-creating AI operating system.
+
+Your personality:
+- Helpful and knowledgeable about the CelFlow system
+- Clear and concise in explanations
+- Proactive in offering assistance
+- Respectful of user privacy and preferences
+- Enthusiastic about AI and system capabilities
+
+Your core capabilities:
+- Answer questions about CelFlow functionality
+- Execute user commands by coordinating with specialized agents
+- Provide system status and insights
+- Offer proactive suggestions based on user patterns
+- Learn and adapt from interactions
+- Execute dynamic Python code when existing tools are insufficient (Lambda capability)"""
+
 
 class CentralAIBrain:
     """The orchestrating intelligence of CelFlow"""
 
+    # System prompts are static, so build them once instead of per request
+    _SYSTEM_PROMPTS: Dict[str, str] = {
+        "chat": _BASE_SYSTEM_PROMPT
+        + "\n\nYou are in casual conversation mode. Be friendly and helpful.",
+        "system_control": _BASE_SYSTEM_PROMPT
+        + "\n\nYou are in system control mode. Focus on understanding and executing system commands safely.",
+        "agent_orchestration": _BASE_SYSTEM_PROMPT
+        + "\n\nYou are coordinating multiple agents. Focus on task delegation and result synthesis.",
+        "embryo_training": _BASE_SYSTEM_PROMPT
+        + "\n\nYou are evaluating embryo training. Focus on pattern analysis and specialization recommendations.",
+    }
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.ai_config = config.get("ai_brain", {})
@@ -69,6 +99,13 @@ class CentralAIBrain:
         self.startup_time = None
         self.interaction_count = 0
 
+        # Per-context-type request queues drained by a single worker
+        self._type_queues: Dict[str, asyncio.Queue] = {}
+        self._requests_pending: Optional[asyncio.Event] = None
+        self._request_worker: Optional[asyncio.Task] = None
+        # Futures of the burst currently being served, resolved on stop()
+        self._inflight_futures: Set[asyncio.Future] = set()
+
         logger.info("CentralAIBrain initialized")
 
     async def start(self):
@@ -92,9 +129,17 @@ class CentralAIBrain:
             if not health_status.get("ollama_healthy", False):
                 raise Exception("Ollama client is not healthy")
 
+            # Load the model into memory now so the first user request
+            # doesn't pay the cold-start penalty
+            await self._warm_up_model()
+
             self.is_running = True
             self.startup_time = datetime.now()
 
+            if self.ai_config.get("group_requests_by_type", False):
+                self._requests_pending = asyncio.Event()
+                self._request_worker = asyncio.create_task(self._drain_type_queues())
+
             # Initialize specialized agents (placeholder for now)
             await self._initialize_specialized_agents()
 
@@ -104,14 +149,137 @@ class CentralAIBrain:
             logger.error(f"❌ Failed to start Central AI Brain: {e}")
             raise
 
+    async def _warm_up_model(self):
+        """Prime the Ollama model with a minimal generation"""
+        if not self.ai_config.get("warmup_on_start", True):
+            return
+
+        try:
+            await self.ollama_client.generate_response(
+                prompt=" ",
+                system_prompt="",
+                context={"conversation_history": []},
+                max_tokens=1,
+            )
+            logger.info("🔥 Ollama model warmed up")
+        except Exception as e:
+            logger.warning(f"Model warmup failed, continuing startup: {e}")
+            return
+
+        if self.ai_config.get("prime_system_prompts", True):
+            await self._prime_system_prompts()
+
+    async def _prime_system_prompts(self):
+        """Evaluate the common system prompts once so Ollama caches their prefix"""
+        # Each Ollama slot keeps only the KV state of the last prompt it
+        # evaluated, so priming more types than slots just evicts earlier ones
+        context_types = self.ai_config.get("prime_context_types", ["chat"])
+        num_slots = self.ai_config.get("ollama_num_parallel", 1)
+
+        for context_type in context_types[:num_slots]:
+            try:
+                await self.ollama_client.generate_response(
+                    prompt=" ",
+                    system_prompt=self._SYSTEM_PROMPTS[context_type],
+                    context={"conversation_history": []},
+                    max_tokens=1,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to prime {context_type} system prompt: {e}")
+
+    async def _generate_grouped(self, context_type: str, **kwargs) -> str:
+        """Queue a generation request behind others of the same context type"""
+        if not self._request_worker:
+            return await self.ollama_client.generate_response(**kwargs)
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._type_queues.setdefault(context_type, asyncio.Queue())
+        queue.put_nowait((kwargs, future))
+        self._requests_pending.set()
+        return await future
+
+    async def _drain_type_queues(self):
+        """Serve queued requests in per-type bursts"""
+        # Consecutive requests sharing a system prompt reuse the prompt prefix
+        # Ollama already has cached, instead of interleaving context types
+        max_concurrent = self.ollama_client.max_concurrent_requests
+        burst_size = self.ai_config.get("group_burst_size", max_concurrent)
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        while True:
+            await self._requests_pending.wait()
+            self._requests_pending.clear()
+
+            for queue in list(self._type_queues.values()):
+                # At most one burst per type per pass, so a queue that keeps
+                # refilling can't starve the other context types
+                burst = []
+                while not queue.empty() and len(burst) < burst_size:
+                    kwargs, future = queue.get_nowait()
+                    if not future.done():
+                        burst.append((kwargs, future))
+                        self._inflight_futures.add(future)
+
+                if burst:
+                    await asyncio.gather(
+                        *(
+                            self._serve_grouped(semaphore, kwargs, future)
+                            for kwargs, future in burst
+                        )
+                    )
+
+            if any(not queue.empty() for queue in self._type_queues.values()):
+                self._requests_pending.set()
+
+    async def _serve_grouped(
+        self, semaphore: asyncio.Semaphore, kwargs: Dict[str, Any], future
+    ):
+        """Run one queued generation request and resolve its future"""
+        try:
+            async with semaphore:
+                result = await self.ollama_client.generate_response(**kwargs)
+        except asyncio.CancelledError:
+            # The worker is stopping; don't leave the caller awaiting forever
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._inflight_futures.discard(future)
+
     async def stop(self):
         """Shutdown the Central AI Brain"""
         try:
             logger.info("🛑 Stopping Central AI Brain...")
 
+            if self._request_worker:
+                worker, self._request_worker = self._request_worker, None
+                worker.cancel()
+                try:
+                    await worker
+                except asyncio.CancelledError:
+                    pass
+
+                # Resolve every outstanding request, queued or mid-burst
+                for queue in self._type_queues.values():
+                    while not queue.empty():
+                        _, future = queue.get_nowait()
+                        future.cancel()
+                for future in self._inflight_futures:
+                    future.cancel()
+                self._inflight_futures.clear()
+
             if self.ollama_client:
                 await self.ollama_client.close()
 
+            if self.context_manager:
+                await self.context_manager.close()
+
             self.is_running = False
             logger.info("✅ Central AI Brain stopped successfully")
 
@@ -183,7 +351,7 @@ class CentralAIBrain:
 
         try:
             self.interaction_count += 1
-            start_time = datetime.now()
+            start_time = time.perf_counter()
 
             # Build context for this interaction
             context = await self.context_manager.build_context(
@@ -194,11 +362,14 @@ class CentralAIBrain:
             system_prompt = self._get_system_prompt(context_type)
 
             # Generate response using Ollama
-            response = await self.ollama_client.generate_response(
+            response = await self._generate_grouped(
+                context_type,
                 prompt=user_message,
                 context={"conversation_history": context},
                 system_prompt=system_prompt,
             )
+            response_time = time.perf_counter() - start_time
+            interaction_id = self.interaction_count
 
             # Update context with this interaction
             await self.context_manager.update_context(
@@ -207,8 +378,8 @@ class CentralAIBrain:
                     "assistant_response": response,
                     "context_type": context_type,
                     "metadata": {
-                        "interaction_id": self.interaction_count,
-                        "response_time": (datetime.now() - start_time).total_seconds(),
+                        "interaction_id": interaction_id,
+                        "response_time": response_time,
                     },
                 }
             )
@@ -217,8 +388,8 @@ class CentralAIBrain:
                 "success": True,
                 "message": response,
                 "context_type": context_type,
-                "interaction_id": self.interaction_count,
-                "response_time": (datetime.now() - start_time).total_seconds(),
+                "interaction_id": interaction_id,
+                "response_time": response_time,
             }
 
         except Exception as e:
@@ -279,15 +450,22 @@ class CentralAIBrain:
                 full_response += chunk
                 yield chunk
 
-            # Update context after streaming is complete
-            await self.context_manager.update_context(
-                {
-                    "user_message": user_message,
-                    "assistant_response": full_response,
-                    "context_type": context_type,
-                    "metadata": {"interaction_id": self.interaction_count},
-                }
-            )
+            # Update context after streaming is complete. Shield the update so a
+            # client disconnect doesn't cancel it and lose the interaction.
+            try:
+                await asyncio.shield(
+                    self.context_manager.update_context(
+                        {
+                            "user_message": user_message,
+                            "assistant_response": full_response,
+                            "context_type": context_type,
+                            "metadata": {"interaction_id": self.interaction_count},
+                        }
+                    )
+                )
+            except asyncio.CancelledError:
+                logger.warning("Stream cancelled while recording interaction")
+                raise
 
         except Exception as e:
             logger.error(f"Error streaming response: {e}")
@@ -295,50 +473,7 @@ class CentralAIBrain:
 
     def _get_system_prompt(self, context_type: str) -> str:
         """Get appropriate system prompt based on context type"""
-
-        base_prompt = """You are the Central AI Brain of CelFlow, a self-creating AI operating system.
-
-Your personality:
-- Helpful and knowledgeable about the CelFlow system
-- Clear and concise in explanations
-- Proactive in offering assistance
-- Respectful of user privacy and preferences
-- Enthusiastic about AI and system capabilities
-
-Your core capabilities:
-- Answer questions about CelFlow functionality
-- Execute user commands by coordinating with specialized agents
-- Provide system status and insights
-- Offer proactive suggestions based on user patterns
-- Learn and adapt from interactions
-- Execute dynamic Python code when existing tools are insufficient (Lambda capability)"""
-
-        if context_type == "chat":
-            return (
-                base_prompt
-                + "\n\nYou are in casual conversation mode. Be friendly and helpful."
-            )
-
-        elif context_type == "system_control":
-            return (
-                base_prompt
-                + "\n\nYou are in system control mode. Focus on understanding and executing system commands safely."
-            )
-
-        elif context_type == "agent_orchestration":
-            return (
-                base_prompt
-                + "\n\nYou are coordinating multiple agents. Focus on task delegation and result synthesis."
-            )
-
-        elif context_type == "embryo_training":
-            return (
-                base_prompt
-                + "\n\nYou are evaluating embryo training. Focus on pattern analysis and specialization recommendations."
-            )
-
-        else:
-            return base_prompt
+        return self._SYSTEM_PROMPTS.get(context_type, _BASE_SYSTEM_PROMPT)
 
     async def coordinate_system_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Coordinate complex system actions"""
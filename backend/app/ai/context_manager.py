@@ -3,30 +3,146 @@ CelFlow Central AI Brain - Context Manager
 Manages persistent context and memory for intelligent interactions
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple, Union
+from datetime import datetime
 from pathlib import Path
 import sqlite3
-from dataclasses import dataclass, asdict
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict, field
 from collections import deque
+from itertools import islice
+from functools import lru_cache
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_DAY = 86_400 * _NS_PER_SECOND
+
+# Slotted dataclasses (no per-instance __dict__) where the interpreter allows
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Conversation history and agent knowledge share a single database file
+CONTEXT_DB_PATH = Path("data/context/context.db")
+# Per-store files used before the merge; imported once when found
+_LEGACY_CONVERSATIONS_DB = Path("data/context/conversation_history.db")
+_LEGACY_AGENTS_DB = Path("data/context/agent_knowledge.db")
+
+# Statements run on every request are kept as single constants so each
+# connection's statement cache reuses the prepared form instead of
+# re-parsing the SQL text
+_SQL_INSERT_CONVERSATION = """
+    INSERT INTO conversations
+    (timestamp, user_message, assistant_response, context_type, metadata)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_SQL_SEARCH_CONVERSATIONS_FTS = """
+    SELECT c.timestamp, c.user_message, c.assistant_response,
+           c.context_type, c.metadata, c.id
+    FROM conversations_fts
+    JOIN conversations c ON c.id = conversations_fts.rowid
+    WHERE conversations_fts MATCH ?
+    ORDER BY bm25(conversations_fts)
+    LIMIT ?
+"""
+
+_SQL_SCAN_RECENT_CONVERSATIONS = """
+    SELECT timestamp, user_message, assistant_response, context_type, metadata, id
+    FROM conversations
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+
+_SQL_CONVERSATIONS_BY_TYPE = """
+    SELECT timestamp, user_message, assistant_response, context_type, metadata, id
+    FROM conversations
+    WHERE context_type = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+
+_SQL_DELETE_CONVERSATIONS_BEFORE = "DELETE FROM conversations WHERE timestamp < ?"
 
-@dataclass
+_SQL_SELECT_AGENTS = "SELECT * FROM agents"
+
+_SQL_UPSERT_AGENT = """
+    INSERT OR REPLACE INTO agents
+    (agent_id, name, specialization, capabilities, performance_metrics, created_at, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _json_dumps(obj: Any) -> str:
+    """Encode a value as JSON text"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _json_dumpb(obj: Any) -> bytes:
+    """Encode a value as UTF-8 JSON bytes for BLOB columns"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+@lru_cache(maxsize=4096)
+def _loads_cached(raw: Union[str, bytes]) -> Any:
+    """Decode a JSON column, reusing the result for identical text.
+
+    The decoded value is shared between callers and must not be mutated.
+    """
+    return _json_loads(raw)
+
+
+def _iso_to_ns(value: str) -> int:
+    """Convert an ISO 8601 timestamp to integer nanoseconds since the epoch"""
+    moment = datetime.fromisoformat(value)
+    # Whole seconds and microseconds separately, so no float rounding
+    seconds = int(moment.replace(microsecond=0).timestamp())
+    return seconds * _NS_PER_SECOND + moment.microsecond * 1000
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class ConversationExchange:
     """Single conversation exchange"""
 
-    timestamp: datetime
+    timestamp: int  # Nanoseconds since the epoch
     user_message: str
     assistant_response: str
     context_type: str
     metadata: Dict[str, Any]
+    # Database row id, known once the exchange has been persisted
+    id: Optional[int] = None
+
+    @property
+    def timestamp_iso(self) -> str:
+        """Timestamp as a local ISO 8601 string"""
+        return datetime.fromtimestamp(self.timestamp / 1e9).isoformat()
 
 
-@dataclass
+def _exchange_from_row(row: tuple) -> ConversationExchange:
+    """Build an exchange from a conversations row (timestamp ... id)"""
+    return ConversationExchange(
+        row[0], row[1], row[2], row[3], _loads_cached(row[4]), row[5]
+    )
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class UserProfile:
     """User profile and preferences"""
 
@@ -35,6 +151,8 @@ class UserProfile:
     interaction_patterns: Dict[str, Any] = None
     created_at: datetime = None
     last_updated: datetime = None
+    # Serialized preferences; reset whenever preferences change
+    _prefs_json_cache: Optional[str] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if self.preferences is None:
@@ -47,7 +165,7 @@ class UserProfile:
             self.last_updated = datetime.now()
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class SystemState:
     """Current system state information"""
 
@@ -70,29 +188,142 @@ class SystemState:
             self.last_updated = datetime.now()
 
 
-class ConversationHistory:
+class SQLiteStore:
+    """Base for stores backed by a long-lived SQLite connection per thread"""
+
+    # Per-connection settings, applied whenever a connection is opened
+    CONNECTION_PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",  # One fsync per commit under WAL
+        "PRAGMA temp_store=MEMORY",  # Use memory for temp tables
+        "PRAGMA mmap_size=268435456",  # 256MB memory map
+        "PRAGMA busy_timeout=5000",  # Wait on locks instead of failing
+    )
+
+    # Database files already switched to WAL (the mode persists in the file)
+    _wal_enabled: Set[str] = set()
+    # Thread-local connection holders, shared by stores on the same file
+    _thread_locals: Dict[str, threading.local] = {}
+    # Every open connection per file, whichever thread opened it, so close()
+    # also reaches connections made on executor threads
+    _open_connections: Dict[str, Set[sqlite3.Connection]] = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        key = str(self.db_path.resolve())
+        self._local = SQLiteStore._thread_locals.setdefault(key, threading.local())
+        with SQLiteStore._connections_lock:
+            self._connections = SQLiteStore._open_connections.setdefault(key, set())
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get thread-local database connection"""
+        connection = getattr(self._local, "connection", None)
+        # A connection missing from the open set was closed by close()
+        if connection is None or connection not in self._connections:
+            connection = sqlite3.connect(
+                self.db_path,
+                timeout=30.0,
+                check_same_thread=False,
+                cached_statements=256,
+            )
+            self._configure_connection(connection)
+            with SQLiteStore._connections_lock:
+                self._connections.add(connection)
+            self._local.connection = connection
+        return connection
+
+    def _configure_connection(self, connection: sqlite3.Connection):
+        """Apply WAL mode and performance pragmas to a new connection"""
+        key = str(self.db_path.resolve())
+        try:
+            if key not in SQLiteStore._wal_enabled:
+                connection.execute("PRAGMA journal_mode=WAL")
+                SQLiteStore._wal_enabled.add(key)
+            for pragma in self.CONNECTION_PRAGMAS:
+                connection.execute(pragma)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not configure {self.db_path}: {e}")
+
+    def close(self):
+        """Close the database connections of every thread"""
+        with SQLiteStore._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+        if hasattr(self._local, "connection"):
+            del self._local.connection
+
+    def _import_legacy_table(self, table: str, legacy_path: Path):
+        """Copy a table over from a pre-merge database file if it's missing here"""
+        if not legacy_path.exists() or legacy_path.resolve() == self.db_path.resolve():
+            return
+
+        conn = self._get_connection()
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if exists:
+            return
+
+        try:
+            conn.execute("ATTACH DATABASE ? AS legacy", (str(legacy_path),))
+            try:
+                row = conn.execute(
+                    "SELECT sql FROM legacy.sqlite_master "
+                    "WHERE type = 'table' AND name = ?",
+                    (table,),
+                ).fetchone()
+                if row:
+                    with conn:
+                        conn.execute(row[0])
+                        conn.execute(
+                            f"INSERT INTO main.{table} SELECT * FROM legacy.{table}"
+                        )
+                    logger.info(f"Imported {table} from {legacy_path}")
+            finally:
+                conn.execute("DETACH DATABASE legacy")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not import {table} from {legacy_path}: {e}")
+
+
+class ConversationHistory(SQLiteStore):
     """Manages conversation history with intelligent retrieval"""
 
-    def __init__(self, max_size: int = 50):
+    def __init__(self, max_size: int = 50, db_path: Path = CONTEXT_DB_PATH):
+        super().__init__(db_path)
         self.max_size = max_size
         self.exchanges = deque(maxlen=max_size)
-        self.db_path = Path("data/context/conversation_history.db")
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fts_enabled = False
+        # Rows scanned by the substring search used when FTS5 is missing
+        self.fallback_scan_rows = 5000
+
+        # Background batching of database writes
+        self.flush_batch_size = 50
+        self.flush_interval = 0.1
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
         self._init_database()
 
     def _init_database(self):
         """Initialize SQLite database for persistent storage"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            self._import_legacy_table("conversations", _LEGACY_CONVERSATIONS_DB)
+            self._migrate_text_timestamps()
+
+            conn = self._get_connection()
+            with conn:
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS conversations (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
+                        timestamp INTEGER NOT NULL,
                         user_message TEXT NOT NULL,
                         assistant_response TEXT NOT NULL,
                         context_type TEXT NOT NULL,
-                        metadata TEXT NOT NULL
+                        metadata BLOB NOT NULL
                     )
                 """
                 )
@@ -102,128 +333,309 @@ class ConversationHistory:
                     ON conversations(timestamp)
                 """
                 )
+                # Serves get_by_context_type as a pure index range scan, and
+                # covers plain context_type lookups through its prefix
                 conn.execute(
                     """
-                    CREATE INDEX IF NOT EXISTS idx_context_type 
-                    ON conversations(context_type)
+                    CREATE INDEX IF NOT EXISTS idx_ctx_ts
+                    ON conversations(context_type, timestamp DESC)
                 """
                 )
+                conn.execute("DROP INDEX IF EXISTS idx_context_type")
+            self._init_fts()
         except Exception as e:
             logger.error(f"Failed to initialize conversation database: {e}")
 
-    def add_exchange(self, exchange: ConversationExchange):
-        """Add new conversation exchange"""
-        self.exchanges.append(exchange)
-        self._persist_exchange(exchange)
+    def _migrate_text_timestamps(self):
+        """Convert a conversations table with ISO timestamps to nanoseconds"""
+        conn = self._get_connection()
+        columns = {
+            row[1]: row[2] for row in conn.execute("PRAGMA table_info(conversations)")
+        }
+        if columns.get("timestamp", "").upper() != "TEXT":
+            return
+
+        logger.info("Migrating conversation timestamps to integer nanoseconds")
+        # DDL doesn't open a transaction implicitly, so begin one explicitly
+        # and run every step with execute(): executescript() would commit
+        with conn:
+            conn.execute("BEGIN")
+            # The FTS index is rebuilt from scratch once the table is replaced
+            conn.execute("DROP TRIGGER IF EXISTS conversations_fts_ai")
+            conn.execute("DROP TRIGGER IF EXISTS conversations_fts_ad")
+            conn.execute("DROP TRIGGER IF EXISTS conversations_fts_au")
+            conn.execute("DROP TABLE IF EXISTS conversations_fts")
+            conn.execute("DROP TABLE IF EXISTS conversations_migrated")
+            conn.execute(
+                """
+                CREATE TABLE conversations_migrated (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp INTEGER NOT NULL,
+                    user_message TEXT NOT NULL,
+                    assistant_response TEXT NOT NULL,
+                    context_type TEXT NOT NULL,
+                    metadata BLOB NOT NULL
+                )
+            """
+            )
+            rows = conn.execute(
+                """
+                SELECT id, timestamp, user_message, assistant_response,
+                       context_type, metadata
+                FROM conversations
+            """
+            ).fetchall()
+            conn.executemany(
+                """
+                INSERT INTO conversations_migrated
+                (id, timestamp, user_message, assistant_response, context_type, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                [(row[0], _iso_to_ns(row[1]), *row[2:]) for row in rows],
+            )
+            conn.execute("DROP TABLE conversations")
+            conn.execute("ALTER TABLE conversations_migrated RENAME TO conversations")
 
-    def _persist_exchange(self, exchange: ConversationExchange):
-        """Persist exchange to database"""
+    def _init_fts(self):
+        """Initialize FTS5 index over conversation content"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            conn = self._get_connection()
+            with conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'conversations_fts'"
+                ).fetchone()
+
                 conn.execute(
                     """
-                    INSERT INTO conversations 
-                    (timestamp, user_message, assistant_response, context_type, metadata)
-                    VALUES (?, ?, ?, ?, ?)
-                """,
-                    (
-                        exchange.timestamp.isoformat(),
-                        exchange.user_message,
-                        exchange.assistant_response,
-                        exchange.context_type,
-                        json.dumps(exchange.metadata),
-                    ),
+                    CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+                        user_message,
+                        assistant_response,
+                        content='conversations',
+                        content_rowid='id',
+                        tokenize="unicode61 remove_diacritics 2"
+                    )
+                """
                 )
+                conn.executescript(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS conversations_fts_ai
+                    AFTER INSERT ON conversations BEGIN
+                        INSERT INTO conversations_fts
+                        (rowid, user_message, assistant_response)
+                        VALUES (new.id, new.user_message, new.assistant_response);
+                    END;
+
+                    CREATE TRIGGER IF NOT EXISTS conversations_fts_ad
+                    AFTER DELETE ON conversations BEGIN
+                        INSERT INTO conversations_fts
+                        (conversations_fts, rowid, user_message, assistant_response)
+                        VALUES ('delete', old.id, old.user_message, old.assistant_response);
+                    END;
+
+                    CREATE TRIGGER IF NOT EXISTS conversations_fts_au
+                    AFTER UPDATE ON conversations BEGIN
+                        INSERT INTO conversations_fts
+                        (conversations_fts, rowid, user_message, assistant_response)
+                        VALUES ('delete', old.id, old.user_message, old.assistant_response);
+                        INSERT INTO conversations_fts
+                        (rowid, user_message, assistant_response)
+                        VALUES (new.id, new.user_message, new.assistant_response);
+                    END;
+                """
+                )
+
+                # Index conversations stored before FTS was introduced
+                if not exists:
+                    conn.execute(
+                        "INSERT INTO conversations_fts(conversations_fts) VALUES ('rebuild')"
+                    )
+
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, using LIKE search: {e}")
+
+    def add_exchange(self, exchange: ConversationExchange):
+        """Add new conversation exchange"""
+        self.exchanges.append(exchange)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to flush from, so write through immediately
+            self._persist_exchanges([exchange])
+            return
+
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        self._write_queue.put_nowait(exchange)
+
+    async def _flush_loop(self):
+        """Persist queued exchanges in batches, one transaction per batch"""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._write_queue.get()]
+
+                # Give concurrent writers a moment to join this transaction
+                await asyncio.sleep(self.flush_interval)
+                while (
+                    len(batch) < self.flush_batch_size and not self._write_queue.empty()
+                ):
+                    batch.append(self._write_queue.get_nowait())
+
+                # Once handed to the executor the write completes even if
+                # this task is cancelled, so don't keep it as pending
+                pending, batch = batch, []
+                await loop.run_in_executor(None, self._persist_exchanges, pending)
+        except asyncio.CancelledError:
+            if batch:
+                self._persist_exchanges(batch)
+            raise
+
+    async def flush(self):
+        """Stop the background writer and persist any queued exchanges"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        if self._write_queue is not None:
+            batch = []
+            while not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            if batch:
+                self._persist_exchanges(batch)
+
+    def _persist_exchanges(self, exchanges: List[ConversationExchange]):
+        """Persist exchanges to database in a single transaction"""
+        try:
+            conn = self._get_connection()
+            with conn:
+                for exchange in exchanges:
+                    cursor = conn.execute(
+                        _SQL_INSERT_CONVERSATION,
+                        (
+                            exchange.timestamp,
+                            exchange.user_message,
+                            exchange.assistant_response,
+                            exchange.context_type,
+                            _json_dumpb(exchange.metadata),
+                        ),
+                    )
+                    exchange.id = cursor.lastrowid
         except Exception as e:
-            logger.error(f"Failed to persist conversation exchange: {e}")
+            logger.error(f"Failed to persist conversation exchanges: {e}")
 
     def get_recent(self, limit: int = 10) -> List[ConversationExchange]:
         """Get recent conversation exchanges"""
-        return list(self.exchanges)[-limit:]
+        # Walk back from the newest entry instead of copying the whole deque
+        recent = list(islice(reversed(self.exchanges), limit))
+        recent.reverse()
+        return recent
 
     def search_by_content(
         self, query: str, limit: int = 5
     ) -> List[ConversationExchange]:
         """Search conversations by content"""
+        if self.fts_enabled:
+            return self._search_fts(query, limit)
+
+        # Without FTS5, scan the newest rows in Python: str.__contains__ uses
+        # CPython's fast substring search, unlike SQLite's byte-wise LIKE
+        query_lower = query.lower()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            conn = self._get_connection()
+            with conn:
                 cursor = conn.execute(
-                    """
-                    SELECT timestamp, user_message, assistant_response, context_type, metadata
-                    FROM conversations
-                    WHERE user_message LIKE ? OR assistant_response LIKE ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """,
-                    (f"%{query}%", f"%{query}%", limit),
+                    _SQL_SCAN_RECENT_CONVERSATIONS, (self.fallback_scan_rows,)
                 )
 
                 results = []
-                for row in cursor.fetchall():
-                    results.append(
-                        ConversationExchange(
-                            timestamp=datetime.fromisoformat(row[0]),
-                            user_message=row[1],
-                            assistant_response=row[2],
-                            context_type=row[3],
-                            metadata=json.loads(row[4]),
-                        )
-                    )
+                while len(results) < limit:
+                    rows = cursor.fetchmany(500)
+                    if not rows:
+                        break
+                    for row in rows:
+                        if (
+                            query_lower in row[1].lower()
+                            or query_lower in row[2].lower()
+                        ):
+                            results.append(_exchange_from_row(row))
+                            if len(results) == limit:
+                                break
                 return results
         except Exception as e:
             logger.error(f"Failed to search conversations: {e}")
             return []
 
+    def _search_fts(self, query: str, limit: int) -> List[ConversationExchange]:
+        """Search conversations through the FTS5 index, best matches first"""
+        # Quote every term so user text can't inject FTS query syntax
+        terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+        if not terms:
+            return []
+
+        try:
+            conn = self._get_connection()
+            with conn:
+                cursor = conn.execute(
+                    _SQL_SEARCH_CONVERSATIONS_FTS, (" OR ".join(terms), limit)
+                )
+
+                return list(map(_exchange_from_row, cursor.fetchall()))
+        except Exception as e:
+            logger.error(f"Failed to search conversations: {e}")
+            return []
+
     def get_by_context_type(
         self, context_type: str, limit: int = 10
     ) -> List[ConversationExchange]:
         """Get conversations by context type"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    """
-                    SELECT timestamp, user_message, assistant_response, context_type, metadata
-                    FROM conversations
-                    WHERE context_type = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """,
-                    (context_type, limit),
-                )
+            conn = self._get_connection()
+            with conn:
+                cursor = conn.execute(_SQL_CONVERSATIONS_BY_TYPE, (context_type, limit))
 
-                results = []
-                for row in cursor.fetchall():
-                    results.append(
-                        ConversationExchange(
-                            timestamp=datetime.fromisoformat(row[0]),
-                            user_message=row[1],
-                            assistant_response=row[2],
-                            context_type=row[3],
-                            metadata=json.loads(row[4]),
-                        )
-                    )
-                return results
+                return list(map(_exchange_from_row, cursor.fetchall()))
         except Exception as e:
             logger.error(f"Failed to get conversations by context type: {e}")
             return []
 
+    def delete_before(self, cutoff_ns: int):
+        """Delete persisted exchanges older than the cutoff (epoch nanoseconds)"""
+        conn = self._get_connection()
+        # Freed pages don't need zeroing; they're reused or truncated below
+        conn.execute("PRAGMA secure_delete=OFF")
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(_SQL_DELETE_CONVERSATIONS_BEFORE, (cutoff_ns,))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
-class AgentKnowledge:
+
+class AgentKnowledge(SQLiteStore):
     """Manages knowledge about agents and their capabilities"""
 
-    def __init__(self):
+    def __init__(self, db_path: Path = CONTEXT_DB_PATH):
+        super().__init__(db_path)
         self.agents_info = {}
-        self.capabilities_map = {}
+        # Reverse index: capability -> ids of agents that have it
+        self.capabilities_map: Dict[str, Set[str]] = {}
         self.performance_history = {}
-        self.db_path = Path("data/context/agent_knowledge.db")
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._init_database()
         self._load_agent_knowledge()
 
     def _init_database(self):
         """Initialize agent knowledge database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            self._import_legacy_table("agents", _LEGACY_AGENTS_DB)
+            conn = self._get_connection()
+            with conn:
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS agents (
@@ -243,36 +655,55 @@ class AgentKnowledge:
     def _load_agent_knowledge(self):
         """Load agent knowledge from database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("SELECT * FROM agents")
+            conn = self._get_connection()
+            with conn:
+                cursor = conn.execute(_SQL_SELECT_AGENTS)
                 for row in cursor.fetchall():
                     agent_id = row[0]
                     self.agents_info[agent_id] = {
                         "name": row[1],
                         "specialization": row[2],
-                        "capabilities": json.loads(row[3]),
-                        "performance_metrics": json.loads(row[4]),
+                        "capabilities": _loads_cached(row[3]),
+                        "performance_metrics": _loads_cached(row[4]),
                         "created_at": datetime.fromisoformat(row[5]),
                         "last_updated": datetime.fromisoformat(row[6]),
                     }
+                    self._index_capabilities(
+                        agent_id, (), self.agents_info[agent_id]["capabilities"]
+                    )
         except Exception as e:
             logger.error(f"Failed to load agent knowledge: {e}")
 
     def update_agent_info(self, agent_id: str, info: Dict[str, Any]):
         """Update information about an agent"""
+        previous = self.agents_info.get(agent_id, {})
+        self._index_capabilities(
+            agent_id, previous.get("capabilities", ()), info.get("capabilities", ())
+        )
         self.agents_info[agent_id] = info
         self._persist_agent_info(agent_id, info)
 
+    def _index_capabilities(self, agent_id: str, old_caps, new_caps):
+        """Move an agent's entries in the capability index from old to new"""
+        old_caps, new_caps = set(old_caps), set(new_caps)
+
+        for capability in old_caps - new_caps:
+            agents = self.capabilities_map.get(capability)
+            if agents is not None:
+                agents.discard(agent_id)
+                if not agents:
+                    del self.capabilities_map[capability]
+
+        for capability in new_caps - old_caps:
+            self.capabilities_map.setdefault(capability, set()).add(agent_id)
+
     def _persist_agent_info(self, agent_id: str, info: Dict[str, Any]):
         """Persist agent information to database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            conn = self._get_connection()
+            with conn:
                 conn.execute(
-                    """
-                    INSERT OR REPLACE INTO agents
-                    (agent_id, name, specialization, capabilities, performance_metrics, created_at, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
+                    _SQL_UPSERT_AGENT,
                     (
                         agent_id,
                         info.get("name", "Unknown"),
@@ -288,11 +719,7 @@ class AgentKnowledge:
 
     def get_agents_by_capability(self, capability: str) -> List[str]:
         """Get agents that have a specific capability"""
-        matching_agents = []
-        for agent_id, info in self.agents_info.items():
-            if capability in info.get("capabilities", []):
-                matching_agents.append(agent_id)
-        return matching_agents
+        return list(self.capabilities_map.get(capability, ()))
 
 
 class ContextManager:
@@ -304,15 +731,20 @@ class ContextManager:
         self.context_refresh_interval = config.get("context_refresh_interval", 3600)
         self.memory_persistence = config.get("memory_persistence", True)
         self.max_context_tokens = config.get("max_context_tokens", 6000)
+        self.db_path = Path(config.get("db_path", CONTEXT_DB_PATH))
 
         # Initialize components
         self.user_profile = UserProfile()
-        self.conversation_history = ConversationHistory(self.max_conversation_history)
+        self.conversation_history = ConversationHistory(
+            self.max_conversation_history, self.db_path
+        )
         self.system_state = SystemState()
-        self.agent_knowledge = AgentKnowledge()
+        self.agent_knowledge = AgentKnowledge(self.db_path)
 
         # Context cache
         self.context_cache = {}
+        # Per interaction type, the optional build_context sections to run
+        self._builders: Dict[str, Tuple[Callable, ...]] = {}
         self.last_context_refresh = datetime.now()
 
         logger.info("ContextManager initialized")
@@ -326,53 +758,81 @@ class ContextManager:
         ).seconds > self.context_refresh_interval:
             await self._refresh_context()
 
-        context_parts = []
+        # Rough 4 chars per token; later sections are skipped once it's spent
+        char_budget = self.max_context_tokens * 4
 
         # Add system state
-        context_parts.append(
-            f"System Status: {self.system_state.system_health.get('status', 'unknown')}"
-        )
-        context_parts.append(
-            f"Active Agents: {', '.join(self.system_state.active_agents) if self.system_state.active_agents else 'None'}"
-        )
+        context_parts = [
+            f"System Status: {self.system_state.system_health.get('status', 'unknown')}",
+            f"Active Agents: {', '.join(self.system_state.active_agents) if self.system_state.active_agents else 'None'}",
+        ]
+        used = len(context_parts[0]) + len(context_parts[1])
 
         # Add user profile information
-        if self.user_profile.preferences:
-            context_parts.append(
-                f"User Preferences: {json.dumps(self.user_profile.preferences)}"
+        profile = self.user_profile
+        if profile.preferences and used < char_budget:
+            if profile._prefs_json_cache is None:
+                profile._prefs_json_cache = _json_dumps(profile.preferences)
+            part = f"User Preferences: {profile._prefs_json_cache}"
+            context_parts.append(part)
+            used += len(part)
+
+        # Add the sections that apply to this interaction type
+        sections = self._builders.get(interaction_type)
+        if sections is None:
+            sections = self._builders[interaction_type] = self._plan_sections(
+                interaction_type
             )
-
-        # Add relevant conversation history
-        if interaction_type in ["chat", "user_interface"]:
-            recent_exchanges = self.conversation_history.get_recent(5)
-            if recent_exchanges:
-                context_parts.append("Recent Conversation:")
-                for exchange in recent_exchanges[-3:]:  # Last 3 exchanges
-                    context_parts.append(f"  User: {exchange.user_message[:100]}...")
-                    context_parts.append(
-                        f"  Assistant: {exchange.assistant_response[:100]}..."
-                    )
-
-        # Add agent knowledge for orchestration
-        if interaction_type == "agent_orchestration":
-            available_agents = list(self.agent_knowledge.agents_info.keys())
-            if available_agents:
-                context_parts.append(f"Available Agents: {', '.join(available_agents)}")
+        for section in sections:
+            if used >= char_budget:
+                break
+            for part in section():
+                context_parts.append(part)
+                used += len(part)
 
         # Add specific context from kwargs
         for key, value in kwargs.items():
-            if key not in ["user_message", "system_prompt"]:
-                context_parts.append(f"{key.replace('_', ' ').title()}: {value}")
+            if used >= char_budget:
+                break
+            if key not in ("user_message", "system_prompt"):
+                part = f"{key.replace('_', ' ').title()}: {value}"
+                context_parts.append(part)
+                used += len(part)
 
         return "\n".join(context_parts)
 
+    def _plan_sections(self, interaction_type: str) -> Tuple[Callable, ...]:
+        """Resolve which optional context sections an interaction type uses"""
+        if interaction_type in ("chat", "user_interface"):
+            return (self._history_section,)
+        if interaction_type == "agent_orchestration":
+            return (self._agents_section,)
+        return ()
+
+    def _history_section(self) -> List[str]:
+        """Recent conversation lines for chat-style interactions"""
+        recent_exchanges = self.conversation_history.get_recent(3)
+        if not recent_exchanges:
+            return []
+        parts = ["Recent Conversation:"]
+        for exchange in recent_exchanges:
+            parts.append(f"  User: {exchange.user_message[:100]}...")
+            parts.append(f"  Assistant: {exchange.assistant_response[:100]}...")
+        return parts
+
+    def _agents_section(self) -> List[str]:
+        """Known agents for orchestration interactions"""
+        if not self.agent_knowledge.agents_info:
+            return []
+        return [f"Available Agents: {', '.join(self.agent_knowledge.agents_info)}"]
+
     async def update_context(self, interaction: Dict[str, Any]):
         """Update persistent context with new information"""
 
         # Update conversation history
         if "user_message" in interaction and "assistant_response" in interaction:
             exchange = ConversationExchange(
-                timestamp=datetime.now(),
+                timestamp=time.time_ns(),
                 user_message=interaction["user_message"],
                 assistant_response=interaction["assistant_response"],
                 context_type=interaction.get("context_type", "general"),
@@ -392,6 +852,7 @@ class ContextManager:
         # Update user profile if provided
         if "user_preferences" in interaction:
             self.user_profile.preferences.update(interaction["user_preferences"])
+            self.user_profile._prefs_json_cache = None
             self.user_profile.last_updated = datetime.now()
 
     async def get_relevant_history(
@@ -407,15 +868,13 @@ class ContextManager:
         # Add recent exchanges for context
         recent_exchanges = self.conversation_history.get_recent(limit // 2)
 
-        # Combine and deduplicate
-        all_exchanges = relevant_exchanges + recent_exchanges
-        seen_timestamps = set()
-        unique_exchanges = []
-
-        for exchange in all_exchanges:
-            if exchange.timestamp not in seen_timestamps:
-                unique_exchanges.append(exchange)
-                seen_timestamps.add(exchange.timestamp)
+        # Combine and deduplicate by row id. An exchange that hasn't been
+        # persisted yet can't appear in the search results, so recent
+        # exchanges without an id never need checking.
+        seen_ids = {e.id for e in recent_exchanges if e.id is not None}
+        unique_exchanges = [
+            e for e in relevant_exchanges if e.id not in seen_ids
+        ] + recent_exchanges
 
         # Sort by timestamp and return limited results
         unique_exchanges.sort(key=lambda x: x.timestamp, reverse=True)
@@ -446,7 +905,7 @@ class ContextManager:
             },
             "conversation_history": {
                 "total_exchanges": len(self.conversation_history.exchanges),
-                "recent_activity": len(self.conversation_history.get_recent(10)),
+                "recent_activity": min(10, len(self.conversation_history.exchanges)),
             },
             "system_state": {
                 "active_agents": len(self.system_state.active_agents),
@@ -463,23 +922,21 @@ class ContextManager:
 
     async def cleanup_old_data(self, days_to_keep: int = 30):
         """Clean up old conversation data"""
-        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+        cutoff_ns = time.time_ns() - days_to_keep * _NS_PER_DAY
 
         try:
-            with sqlite3.connect(self.conversation_history.db_path) as conn:
-                conn.execute(
-                    """
-                    DELETE FROM conversations 
-                    WHERE timestamp < ?
-                """,
-                    (cutoff_date.isoformat(),),
-                )
-
+            self.conversation_history.delete_before(cutoff_ns)
             logger.info(f"Cleaned up conversation data older than {days_to_keep} days")
 
         except Exception as e:
             logger.error(f"Failed to cleanup old data: {e}")
 
+    async def close(self):
+        """Flush pending writes and close database connections"""
+        await self.conversation_history.flush()
+        # Both stores share one connection per thread on the same file
+        self.conversation_history.close()
+
 
 # Utility functions
 async def create_context_manager(config: Dict[str, Any]) -> ContextManager:
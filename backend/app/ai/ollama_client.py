@@ -3,19 +3,112 @@ CelFlow Central AI Brain - Ollama Client
 Manages connection to local Ollama Gemma 3:4B model
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, Any, Optional, AsyncIterator
-from datetime import datetime, timedelta
+import time
+import weakref
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple, Union
+from datetime import datetime
 
 import aiohttp
 import tiktoken
-from tenacity import retry, stop_after_attempt, wait_exponential
 from pydantic import BaseModel
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import uvloop
+
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+def install_uvloop() -> bool:
+    """Make asyncio create uvloop event loops when uvloop is installed
+
+    Entry points call this before asyncio.run() creates their loop; it
+    changes the policy for the whole process, so importing never does it.
+    """
+    if not UVLOOP_AVAILABLE:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+# Both parsers accept raw bytes, so streamed lines need no decode step
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize a request payload straight to a bytes body"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+PROMPT_SEPARATOR = "\n\n"
+
+
+# Keep-alive pool shared by every client on the same event loop; idle
+# connections are held long enough to span gaps between validation bursts
+SHARED_CONNECTOR_LIMIT = 64
+SHARED_KEEPALIVE_TIMEOUT = 300
+# Event loop -> [connector, number of open client sessions using it]
+_shared_connectors: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _get_shared_connector() -> aiohttp.TCPConnector:
+    """Return the connection pool for the running event loop"""
+    loop = asyncio.get_running_loop()
+    entry = _shared_connectors.get(loop)
+    if entry is None or entry[0].closed:
+        connector = aiohttp.TCPConnector(
+            limit=SHARED_CONNECTOR_LIMIT, keepalive_timeout=SHARED_KEEPALIVE_TIMEOUT
+        )
+        entry = _shared_connectors[loop] = [connector, 0]
+    entry[1] += 1
+    return entry[0]
+
+
+async def _release_shared_connector(connector: aiohttp.TCPConnector):
+    """Drop one client's use of the pool, closing it after the last client"""
+    entry = _shared_connectors.get(asyncio.get_running_loop())
+    if entry is None or entry[0] is not connector:
+        # Already closed and replaced, e.g. by close_shared_connector()
+        return
+
+    entry[1] -= 1
+    if entry[1] <= 0:
+        await close_shared_connector()
+
+
+async def close_shared_connector():
+    """Close the running event loop's shared connection pool
+
+    Clients release the pool when closed; shutdown hooks can call this to
+    close it regardless of clients that were never closed.
+    """
+    entry = _shared_connectors.pop(asyncio.get_running_loop(), None)
+    if entry is not None and not entry[0].closed:
+        await entry[0].close()
+
+
+@lru_cache(maxsize=None)
+def _get_encoder(name: str):
+    """Load a tiktoken encoding once and share it across clients"""
+    return tiktoken.get_encoding(name)
+
+
 class OllamaResponse(BaseModel):
     """Structured response from Ollama API"""
 
@@ -32,6 +125,16 @@ class OllamaResponse(BaseModel):
 class OllamaClient:
     """Manages connection to local Ollama Gemma 3:4B model"""
 
+    # Minimal prompt used to check that the model responds
+    _HEALTH_PAYLOAD_TEMPLATE = {
+        "prompt": "Hello",
+        "stream": False,
+        "options": {"num_predict": 10, "temperature": 0.1},
+    }
+
+    # Placeholder for the prompt inside the serialized stream request
+    _PROMPT_SLOT = _json_dumps("__PROMPT_SLOT__")
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.base_url = config.get("base_url", "http://localhost:11434")
@@ -40,25 +143,63 @@ class OllamaClient:
         self.max_tokens = config.get("max_tokens", 2048)
         self.temperature = config.get("temperature", 0.7)
         self.context_window = config.get("context_window", 8192)
+        self.read_bufsize = config.get("read_bufsize", 2**20)
+        # Keep the model (and its prompt cache) loaded between requests
+        self.keep_alive = config.get("keep_alive", -1)
+        # Upper bound on in-flight requests for generate_batch
+        self.max_concurrent_requests = config.get("max_concurrent_requests", 8)
+
+        # The health-check body never changes, so serialize it once
+        self._health_body = _json_dumps(
+            {
+                **self._HEALTH_PAYLOAD_TEMPLATE,
+                "model": self.model_name,
+                "keep_alive": self.keep_alive,
+            }
+        )
+        self._stream_template = _json_dumps(
+            {
+                "model": self.model_name,
+                "prompt": "__PROMPT_SLOT__",
+                "stream": True,
+                "keep_alive": self.keep_alive,
+                "options": {
+                    "num_predict": self.max_tokens,
+                    "temperature": self.temperature,
+                    "top_p": 0.9,
+                    "top_k": 40,
+                },
+            }
+        )
 
         # Initialize session and tokenizer
         self.session: Optional[aiohttp.ClientSession] = None
         self.tokenizer = None
         self._initialize_tokenizer()
+        self._last_token_count: Tuple[Optional[str], int] = (None, 0)
+
+        # Token ids of recent system prompts, oldest evicted first
+        self.prefix_cache_size = config.get("prefix_cache_size", 32)
+        self._prefix_cache: Dict[str, List[int]] = {}
+        # Prompts longer than this (in characters) are encoded off the loop
+        self.executor_encode_threshold = config.get("executor_encode_threshold", 4096)
 
         # Health monitoring
         self.last_health_check = None
         self.is_healthy = False
+        self._health_interval = 300.0
+        self.health_check_attempts = 3
+        self._last_health_monotonic = 0.0
 
-        logger.info(f"OllamaClient initialized for model: {self.model_name}")
+        logger.info("OllamaClient initialized for model: %s", self.model_name)
 
     def _initialize_tokenizer(self):
         """Initialize tokenizer for token counting"""
         try:
             # Use a general tokenizer for token counting
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
+            self.tokenizer = _get_encoder("cl100k_base")
         except Exception as e:
-            logger.warning(f"Could not initialize tokenizer: {e}")
+            logger.warning("Could not initialize tokenizer: %s", e)
             self.tokenizer = None
 
     async def __aenter__(self):
@@ -74,103 +215,170 @@ class OllamaClient:
         """Initialize the client session"""
         if not self.session:
             timeout = aiohttp.ClientTimeout(total=self.timeout)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+            # A larger read buffer lets streamed chunks arrive in fewer reads
+            self.session = aiohttp.ClientSession(
+                timeout=timeout,
+                read_bufsize=self.read_bufsize,
+                # Reuse warm keep-alive connections across clients
+                connector=_get_shared_connector(),
+                connector_owner=False,
+                # Payloads are pre-serialized, so the content type is fixed
+                headers={"Content-Type": "application/json"},
+            )
             await self.validate_model_health()
 
     async def close(self):
         """Close the client session"""
         if self.session:
+            connector = self.session.connector
             await self.session.close()
             self.session = None
+            await _release_shared_connector(connector)
 
-    @retry(
-        stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
     async def validate_model_health(self) -> bool:
         """Ensure model is running and responsive"""
-        try:
-            if not self.session:
-                await self.start()
-
-            # Simple health check with minimal prompt
-            await self._make_request(
-                {
-                    "model": self.model_name,
-                    "prompt": "Hello",
-                    "stream": False,
-                    "options": {"num_predict": 10, "temperature": 0.1},
-                }
-            )
+        last_error: Optional[BaseException] = None
+
+        # Only connection-level failures are worth retrying
+        for attempt in range(self.health_check_attempts):
+            if attempt:
+                await asyncio.sleep(min(10, 4 * 2 ** (attempt - 1)))
+
+            try:
+                if not self.session:
+                    await self.start()
+
+                # Simple health check with minimal prompt
+                await self._make_request(self._health_body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                continue
+            except Exception as e:
+                last_error = e
+                break
 
             self.is_healthy = True
             self.last_health_check = datetime.now()
-            logger.info(f"Model {self.model_name} is healthy")
+            self._last_health_monotonic = time.monotonic()
+            logger.info("Model %s is healthy", self.model_name)
             return True
 
-        except Exception as e:
-            self.is_healthy = False
-            logger.error(f"Model health check failed: {e}")
-            return False
+        self.is_healthy = False
+        logger.error("Model health check failed: %s", last_error)
+        return False
 
-    async def _make_request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _make_request(
+        self, payload: Union[Dict[str, Any], bytes]
+    ) -> Dict[str, Any]:
         """Make HTTP request to Ollama API"""
         if not self.session:
             await self.start()
 
         url = f"{self.base_url}/api/generate"
+        body = payload if isinstance(payload, bytes) else _json_dumps(payload)
 
-        async with self.session.post(url, json=payload) as response:
+        async with self.session.post(url, data=body) as response:
             if response.status != 200:
                 error_text = await response.text()
                 raise Exception(f"Ollama API error {response.status}: {error_text}")
 
-            return await response.json()
+            return await self._read_json(response)
+
+    @staticmethod
+    async def _read_json(response: aiohttp.ClientResponse) -> Dict[str, Any]:
+        """Decode a JSON object body straight from the raw response bytes"""
+        data = _json_loads(await response.read())
+        if not isinstance(data, dict):
+            raise Exception(f"Unexpected Ollama response: {type(data).__name__}")
+        return data
 
-    async def count_tokens(self, text: str) -> int:
+    def count_tokens(self, text: str) -> int:
         """Count tokens for context management"""
         if not self.tokenizer:
-            # Rough estimation if tokenizer not available
-            return len(text.split()) * 1.3
+            # Rough estimation (~4 characters per token) if tokenizer not available
+            return len(text) >> 2
+
+        last_text, last_count = self._last_token_count
+        if text == last_text:
+            return last_count
 
         try:
-            return len(self.tokenizer.encode(text))
+            count = len(self.tokenizer.encode(text))
         except Exception as e:
-            logger.warning(f"Token counting failed: {e}")
-            return len(text.split()) * 1.3
+            logger.warning("Token counting failed: %s", e)
+            return len(text) >> 2
 
-    async def generate_response(
-        self,
-        prompt: str,
-        context: Optional[Dict[str, Any]] = None,
-        system_prompt: Optional[str] = None,
-    ) -> str:
-        """Generate response with context awareness"""
+        self._last_token_count = (text, count)
+        return count
 
-        # Check model health periodically
+    async def _ensure_healthy(self):
+        """Re-check model health periodically and fail fast when it's down"""
         if (
             not self.last_health_check
-            or datetime.now() - self.last_health_check > timedelta(minutes=5)
+            or time.monotonic() - self._last_health_monotonic > self._health_interval
         ):
             await self.validate_model_health()
 
         if not self.is_healthy:
             raise Exception("Model is not healthy")
 
-        # Build full prompt with system context
-        full_prompt = self._build_full_prompt(prompt, context, system_prompt)
+    async def _prepare_prompt(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """Build the full prompt, truncated to fit the context window"""
+        if system_prompt is None and not context:
+            # Bare prompt: no segments to batch and no system prefix to cache
+            full_prompt = f"USER: {prompt}{PROMPT_SEPARATOR}ASSISTANT:"
+            token_count = self.count_tokens(full_prompt)
+            if token_count > self.context_window - self.max_tokens:
+                logger.warning("Prompt too long (%d tokens), truncating", token_count)
+                full_prompt = self._truncate_prompt(full_prompt)
+            return full_prompt
+
+        parts = self._build_prompt_parts(prompt, context, system_prompt)
+        full_prompt = PROMPT_SEPARATOR.join(parts)
 
         # Ensure we don't exceed context window
-        token_count = await self.count_tokens(full_prompt)
+        if self.tokenizer and len(full_prompt) > self.executor_encode_threshold:
+            # Long prompts take milliseconds to encode; keep the loop free
+            loop = asyncio.get_running_loop()
+            prompt_ids = await loop.run_in_executor(
+                None, self._encode_prompt, parts, system_prompt
+            )
+        else:
+            prompt_ids = self._encode_prompt(parts, system_prompt)
+        if prompt_ids is not None:
+            token_count = len(prompt_ids)
+        else:
+            token_count = self.count_tokens(full_prompt)
         if token_count > self.context_window - self.max_tokens:
-            logger.warning(f"Prompt too long ({token_count} tokens), truncating")
-            full_prompt = self._truncate_prompt(full_prompt)
+            logger.warning("Prompt too long (%d tokens), truncating", token_count)
+            full_prompt = self._truncate_prompt(full_prompt, prompt_ids)
+
+        return full_prompt
+
+    async def generate_response(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """Generate response with context awareness"""
+
+        await self._ensure_healthy()
+        full_prompt = await self._prepare_prompt(prompt, context, system_prompt)
 
         payload = {
             "model": self.model_name,
             "prompt": full_prompt,
             "stream": False,
+            "keep_alive": self.keep_alive,
             "options": {
-                "num_predict": self.max_tokens,
+                "num_predict": max_tokens or self.max_tokens,
                 "temperature": self.temperature,
                 "top_p": 0.9,
                 "top_k": 40,
@@ -182,14 +390,33 @@ class OllamaClient:
             content = response_data.get("response", "").strip()
 
             # Log interaction for monitoring
-            logger.info(f"Generated response: {len(content)} characters")
+            logger.info("Generated response: %d characters", len(content))
 
             return content
 
         except Exception as e:
-            logger.error(f"Response generation failed: {e}")
+            logger.error("Response generation failed: %s", e)
             raise
 
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        context: Optional[Dict[str, Any]] = None,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> List[str]:
+        """Generate responses for several prompts concurrently"""
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrent_requests)
+
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate_response(
+                    prompt, context, system_prompt, max_tokens
+                )
+
+        return await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+
     async def stream_response(
         self,
         prompt: str,
@@ -198,35 +425,26 @@ class OllamaClient:
     ) -> AsyncIterator[str]:
         """Stream real-time responses for chat interface"""
 
-        if not self.is_healthy:
-            await self.validate_model_health()
-            if not self.is_healthy:
-                raise Exception("Model is not healthy")
-
-        full_prompt = self._build_full_prompt(prompt, context, system_prompt)
+        await self._ensure_healthy()
+        full_prompt = await self._prepare_prompt(prompt, context, system_prompt)
 
-        payload = {
-            "model": self.model_name,
-            "prompt": full_prompt,
-            "stream": True,
-            "options": {
-                "num_predict": self.max_tokens,
-                "temperature": self.temperature,
-            },
-        }
+        # Only the prompt varies, so splice it into the pre-serialized body
+        body = self._stream_template.replace(
+            self._PROMPT_SLOT, _json_dumps(full_prompt), 1
+        )
 
         url = f"{self.base_url}/api/generate"
 
         try:
-            async with self.session.post(url, json=payload) as response:
+            async with self.session.post(url, data=body) as response:
                 if response.status != 200:
                     error_text = await response.text()
                     raise Exception(f"Ollama API error {response.status}: {error_text}")
 
-                async for line in response.content:
+                async for line in self._iter_stream_lines(response.content):
                     if line:
                         try:
-                            data = json.loads(line.decode("utf-8"))
+                            data = _json_loads(line)
                             if "response" in data:
                                 yield data["response"]
                             if data.get("done", False):
@@ -235,20 +453,33 @@ class OllamaClient:
                             continue
 
         except Exception as e:
-            logger.error(f"Streaming response failed: {e}")
+            logger.error("Streaming response failed: %s", e)
             raise
 
-    def _build_full_prompt(
+    async def _iter_stream_lines(
+        self, content: aiohttp.StreamReader
+    ) -> AsyncIterator[bytearray]:
+        """Split a streamed body into lines using one reusable buffer"""
+        pending = bytearray()
+        async for chunk in content.iter_any():
+            pending += chunk
+            end = pending.rfind(b"\n")
+            if end != -1:
+                for line in pending[:end].split(b"\n"):
+                    yield line
+                del pending[: end + 1]
+
+        if pending:
+            yield pending
+
+    def _build_prompt_parts(
         self,
         prompt: str,
         context: Optional[Dict[str, Any]] = None,
         system_prompt: Optional[str] = None,
-    ) -> str:
-        """Build full prompt with system context"""
-        parts = []
-
-        if system_prompt:
-            parts.append(f"SYSTEM: {system_prompt}")
+    ) -> List[str]:
+        """Build the prompt segments that make up the full prompt"""
+        parts = [f"SYSTEM: {system_prompt}"] if system_prompt else []
 
         if context:
             # Add relevant context information
@@ -257,16 +488,55 @@ class OllamaClient:
             if "user_profile" in context:
                 parts.append(f"User Context: {context['user_profile']}")
             if "conversation_history" in context:
-                history = context["conversation_history"][-5:]  # Last 5 exchanges
-                for exchange in history:
-                    parts.append(f"Previous: {exchange}")
+                # Last 5 exchanges
+                parts.extend(
+                    f"Previous: {exchange}"
+                    for exchange in context["conversation_history"][-5:]
+                )
+
+        parts.extend((f"USER: {prompt}", "ASSISTANT:"))
 
-        parts.append(f"USER: {prompt}")
-        parts.append("ASSISTANT:")
+        return parts
 
-        return "\n\n".join(parts)
+    def _encode_prompt(
+        self, parts: List[str], system_prompt: Optional[str] = None
+    ) -> Optional[List[int]]:
+        """Tokenize prompt segments in one batch call"""
+        if not self.tokenizer:
+            return None
 
-    def _truncate_prompt(self, prompt: str) -> str:
+        try:
+            # Encode each segment with its separator so the ids cover the
+            # joined prompt; encode_ordinary skips special-token scanning
+            segments = [part + PROMPT_SEPARATOR for part in parts[:-1]]
+            segments.append(parts[-1])
+
+            # The system segment leads the prompt and repeats across calls
+            prefix_ids = None
+            if system_prompt:
+                prefix_ids = self._prefix_cache.get(system_prompt)
+                if prefix_ids is not None:
+                    segments = segments[1:]
+
+            encoded = self.tokenizer.encode_ordinary_batch(segments)
+            if system_prompt and prefix_ids is None:
+                prefix_ids = encoded[0]
+                encoded = encoded[1:]
+                if len(self._prefix_cache) >= self.prefix_cache_size:
+                    self._prefix_cache.pop(next(iter(self._prefix_cache)))
+                self._prefix_cache[system_prompt] = prefix_ids
+
+            ids: List[int] = list(prefix_ids) if prefix_ids else []
+            for segment_ids in encoded:
+                ids.extend(segment_ids)
+            return ids
+        except Exception as e:
+            logger.warning("Prompt encoding failed: %s", e)
+            return None
+
+    def _truncate_prompt(
+        self, prompt: str, prompt_ids: Optional[List[int]] = None
+    ) -> str:
         """Truncate prompt to fit context window"""
         max_tokens = self.context_window - self.max_tokens - 100  # Safety margin
 
@@ -275,11 +545,10 @@ class OllamaClient:
             max_chars = max_tokens * 4  # Rough estimate
             return prompt[-max_chars:]
 
-        # Truncate by tokens
-        tokens = self.tokenizer.encode(prompt)
+        # Truncate by tokens, reusing ids from the length check when given
+        tokens = prompt_ids if prompt_ids is not None else self.tokenizer.encode(prompt)
         if len(tokens) > max_tokens:
-            truncated_tokens = tokens[-max_tokens:]
-            return self.tokenizer.decode(truncated_tokens)
+            return self.tokenizer.decode(tokens[-max_tokens:])
 
         return prompt
 
@@ -289,14 +558,14 @@ class OllamaClient:
             url = f"{self.base_url}/api/show"
             payload = {"name": self.model_name}
 
-            async with self.session.post(url, json=payload) as response:
+            async with self.session.post(url, data=_json_dumps(payload)) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await self._read_json(response)
                 else:
                     return {"error": f"Could not get model info: {response.status}"}
 
         except Exception as e:
-            logger.error(f"Failed to get model info: {e}")
+            logger.error("Failed to get model info: %s", e)
             return {"error": str(e)}
 
     def get_health_status(self) -> Dict[str, Any]:
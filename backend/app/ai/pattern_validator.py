@@ -6,20 +6,134 @@ the CelFlow system. It validates classifications, resolves conflicts,
 and maintains system coherence.
 """
 
+import asyncio
+import hashlib
+import heapq
 import json
 import logging
+import sys
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Callable, Deque, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
 import uuid
+from collections import Counter, deque
 
 from .ollama_client import OllamaClient
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Slotted dataclasses (no per-instance __dict__) where the interpreter allows
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _json_dumps(obj: Any) -> str:
+    """Encode a value as JSON text"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+# Fixed layout of the validation context; each block ends with a blank line
+_CONTEXT_HEADER_TEMPLATE = (
+    "VALIDATION_REQUEST: {action}\n"
+    "VALIDATION_ID: {validation_id}\n"
+    "PATTERNS_COUNT: {count}\n"
+)
+_PATTERN_TEMPLATE = (
+    "PATTERN_{index}:\n"
+    "  ID: {pattern.pattern_id}\n"
+    "  CATEGORY: {pattern.category}\n"
+    "  SUBCATEGORY: {pattern.subcategory}\n"
+    "  CONFIDENCE: {pattern.confidence}\n"
+    "  SOURCE_AGENT: {pattern.source_agent}\n"
+    "  TIMESTAMP: {timestamp}\n"
+)
+_SYSTEM_METRICS_TEMPLATE = (
+    "SYSTEM_METRICS:\n"
+    "  Total Patterns: {total}\n"
+    "  Active Conflicts: {conflicts}\n"
+    "  Average Consistency: {consistency:.2f}\n"
+    "  Average Quality: {quality:.2f}\n"
+)
+
+# Canned answer used when the AI cannot be reached; it never changes
+_FALLBACK_VALIDATION_JSON = _json_dumps(
+    {
+        "validation_id": "fallback",
+        "patterns_analyzed": [],
+        "system_coherence": {
+            "overall_consistency": 0.5,
+            "conflict_count": 0,
+            "quality_average": 0.5,
+            "improvement_areas": ["ai_communication"],
+        },
+        "actions_required": [],
+        "validation_summary": {
+            "total_patterns": 0,
+            "coherent_patterns": 0,
+            "conflicts_resolved": 0,
+            "recommendations_made": 1,
+            "system_health": "FAIR",
+        },
+    }
+)
+
+
+class _JsonDocumentScanner:
+    """Detect where a streamed top-level JSON object or array closes"""
+
+    __slots__ = ("depth", "in_string", "escaped", "active")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        # None until the first non-blank character shows whether it is JSON
+        self.active: Optional[bool] = None
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """Consume a chunk; return the offset just past the document's end"""
+        if self.active is False:
+            return None
+
+        for index, char in enumerate(chunk):
+            if self.active is None:
+                if char.isspace():
+                    continue
+                self.active = char in "{["
+                if not self.active:
+                    return None
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    return index + 1
+
+        return None
+
 
 class ValidationActionType(Enum):
     """Types of validation actions that can be performed"""
@@ -64,7 +178,33 @@ class SystemHealth(Enum):
     CRITICAL = "CRITICAL"
 
 
-@dataclass
+def _default_validation_result() -> Dict[str, Any]:
+    """Fresh default verdict for a pattern in a text-parsed response"""
+    return {
+        "is_coherent": True,
+        "consistency_score": 0.8,
+        "quality_score": 0.8,
+        "conflicts_detected": [],
+        "recommendations": [],
+    }
+
+
+@lru_cache(maxsize=None)
+def _read_prompt_template(path: str) -> Optional[str]:
+    """Read a prompt template file once per process"""
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+# Value-to-member lookups for enums parsed out of AI responses
+_PRIORITY_MAP = {member.value: member for member in ValidationPriority}
+_HEALTH_MAP = {member.value: member for member in SystemHealth}
+
+
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class PatternClassification:
     """Represents a pattern classification"""
 
@@ -77,7 +217,7 @@ class PatternClassification:
     metadata: Dict[str, Any] = None
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class ValidationResult:
     """Results of pattern validation"""
 
@@ -88,7 +228,7 @@ class ValidationResult:
     recommendations: List[str]
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class ValidationAction:
     """Action required based on validation"""
 
@@ -100,7 +240,7 @@ class ValidationAction:
     priority: ValidationPriority
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class SystemCoherence:
     """Overall system coherence metrics"""
 
@@ -110,7 +250,36 @@ class SystemCoherence:
     improvement_areas: List[str]
 
 
-@dataclass
+def _action_to_dict(action: ValidationAction) -> Dict[str, Any]:
+    """Flatten a validation action for API results"""
+    return {
+        "action_type": action.action_type,
+        "pattern_id": action.pattern_id,
+        "current_category": action.current_category,
+        "recommended_category": action.recommended_category,
+        "reason": action.reason,
+        "priority": action.priority.value,
+    }
+
+
+# System-level recommendations, each raised when its check holds
+_HEALTH_RULES: List[Tuple[Callable[[SystemCoherence], bool], str]] = [
+    (
+        lambda c: c.overall_consistency < 0.7,
+        "Improve cross-agent classification consistency",
+    ),
+    (
+        lambda c: c.quality_average < 0.8,
+        "Enhance pattern classification quality",
+    ),
+    (
+        lambda c: c.conflict_count > 5,
+        "Address high number of classification conflicts",
+    ),
+]
+
+
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class ValidationSummary:
     """Summary of validation session"""
 
@@ -155,9 +324,26 @@ class PatternValidator:
     def __init__(self, ollama_client: OllamaClient):
         """Initialize the PatternValidator"""
         self.ollama_client = ollama_client
-        self.validation_history: List[PatternValidationResponse] = []
+        # Recent validations only; the oldest entries drop off automatically
+        self.max_validation_history = 1000
+        self.validation_history: Deque[PatternValidationResponse] = deque(
+            maxlen=self.max_validation_history
+        )
         self.pattern_registry: Dict[str, PatternClassification] = {}
         self.conflict_registry: Dict[str, List[str]] = {}
+        # Running registry aggregates, updated as patterns are registered
+        self._category_counts: Counter = Counter()
+        self._confidence_sum = 0.0
+        # Least confident patterns sent to the AI by system_audit
+        self.audit_sample_size = 64
+        # Requests packed into one prompt by validate_patterns_batch
+        self.max_requests_per_prompt = 8
+        # Upper bound on AI validation calls in flight at once
+        self.max_concurrent_validations = 16
+        self._validation_semaphore: Optional[asyncio.Semaphore] = None
+        # Recent AI answers keyed by request content, oldest evicted first
+        self.response_cache_size = 256
+        self._response_cache: Dict[str, str] = {}
         self.metrics = {
             "validations_performed": 0,
             "conflicts_resolved": 0,
@@ -165,21 +351,22 @@ class PatternValidator:
             "system_audits": 0,
             "average_consistency_score": 0.0,
             "average_quality_score": 0.0,
+            "cache_hits": 0,
         }
 
         # Load prompt template
         self.prompt_template = self._load_prompt_template()
+        self._prompt_suffix = "\n\nProvide validation analysis:"
 
         logger.info("PatternValidator initialized successfully")
 
     def _load_prompt_template(self) -> str:
         """Load the pattern validation prompt template"""
-        try:
-            with open("app/ai/prompts/pattern_validation.txt", "r") as f:
-                return f.read()
-        except FileNotFoundError:
+        template = _read_prompt_template("app/ai/prompts/pattern_validation.txt")
+        if template is None:
             logger.error("Pattern validation prompt template not found")
             return "You are a pattern validation agent. Validate pattern classifications for coherence and consistency."
+        return template
 
     async def validate_patterns(
         self, request: PatternValidationRequest
@@ -194,13 +381,15 @@ class PatternValidator:
             PatternValidationResponse with validation results
         """
         try:
-            logger.info(f"Starting pattern validation: {request.validation_id}")
+            logger.info("Starting pattern validation: %s", request.validation_id)
 
             # Build context for AI
             context = self._build_validation_context(request)
 
             # Get AI validation
-            ai_response = await self._get_ai_validation(context)
+            ai_response = await self._get_ai_validation(
+                context, self._validation_cache_key([request])
+            )
 
             # Process AI response
             validation_response = self._process_validation_response(
@@ -213,13 +402,79 @@ class PatternValidator:
             # Store validation history
             self.validation_history.append(validation_response)
 
-            logger.info(f"Pattern validation completed: {request.validation_id}")
+            logger.info("Pattern validation completed: %s", request.validation_id)
             return validation_response
 
         except Exception as e:
-            logger.error(f"Error in pattern validation: {str(e)}")
+            logger.error("Error in pattern validation: %s", e)
             return self._create_error_response(request.validation_id, str(e))
 
+    async def validate_patterns_batch(
+        self, requests: List[PatternValidationRequest]
+    ) -> List[PatternValidationResponse]:
+        """
+        Validate several requests, packing each chunk into a single AI call
+
+        Args:
+            requests: PatternValidationRequests to validate together
+
+        Returns:
+            PatternValidationResponses in the same order as the requests
+        """
+        size = self.max_requests_per_prompt
+        chunk_responses = await asyncio.gather(
+            *(
+                self._validate_request_chunk(requests[start : start + size])
+                for start in range(0, len(requests), size)
+            )
+        )
+        return [response for chunk in chunk_responses for response in chunk]
+
+    async def _validate_request_chunk(
+        self, requests: List[PatternValidationRequest]
+    ) -> List[PatternValidationResponse]:
+        """Validate a chunk of requests with one AI call"""
+        try:
+            logger.info("Starting batched validation of %d requests", len(requests))
+
+            # Demarcate each request so the answers can be split back apart
+            context = "\n".join(
+                f"=== REQUEST {i} ===\n{self._build_validation_context(request)}"
+                for i, request in enumerate(requests, 1)
+            )
+            context += (
+                f"\nRespond with a JSON array of {len(requests)} validation "
+                "objects, one per REQUEST, in order."
+            )
+
+            ai_response = await self._get_ai_validation(
+                context, self._validation_cache_key(requests)
+            )
+            batch_data = self._split_batch_response(ai_response, len(requests))
+
+            responses = []
+            for request, response_data in zip(requests, batch_data):
+                if response_data is None:
+                    response_data = self._parse_text_response(
+                        ai_response, request.patterns
+                    )
+                validation_response = self._build_validation_response(
+                    request.validation_id, response_data, request.patterns
+                )
+                self._update_validation_state(validation_response)
+                self.validation_history.append(validation_response)
+                responses.append(validation_response)
+
+            logger.info("Batched validation completed: %d requests", len(requests))
+            return responses
+
+        except Exception as e:
+            logger.error("Error in batched pattern validation: %s", e)
+            return [
+                self._create_error_response(request.validation_id, str(e))
+                for request in requests
+            ]
+
     async def validate_single_pattern(
         self, pattern: PatternClassification
     ) -> ValidationResult:
@@ -245,6 +500,14 @@ class PatternValidator:
                 recommendations=["Retry validation"],
             )
 
+    async def validate_many(
+        self, patterns: List[PatternClassification]
+    ) -> List[ValidationResult]:
+        """Validate several patterns concurrently, one request each"""
+        return await asyncio.gather(
+            *(self.validate_single_pattern(pattern) for pattern in patterns)
+        )
+
     async def cross_validate_agents(
         self, pattern_id: str, classifications: List[PatternClassification]
     ) -> Dict[str, Any]:
@@ -267,18 +530,26 @@ class PatternValidator:
                 classifications
             ),
             "actions_required": [
-                asdict(action) for action in response.actions_required
+                _action_to_dict(action) for action in response.actions_required
             ],
         }
 
     async def system_audit(self) -> Dict[str, Any]:
         """Perform comprehensive system coherence audit"""
-        all_patterns = list(self.pattern_registry.values())
+        # Only the least certain patterns go to the AI; registry-wide figures
+        # come from the aggregates kept up to date as patterns are registered
+        audited_patterns = heapq.nsmallest(
+            self.audit_sample_size,
+            self.pattern_registry.values(),
+            key=attrgetter("confidence"),
+        )
+        registry_summary = self._get_registry_summary()
 
         request = PatternValidationRequest(
             validation_id=f"audit_{uuid.uuid4().hex[:8]}",
             action=ValidationActionType.SYSTEM_AUDIT,
-            patterns=all_patterns,
+            patterns=audited_patterns,
+            context=registry_summary,
         )
 
         response = await self.validate_patterns(request)
@@ -287,11 +558,13 @@ class PatternValidator:
         return {
             "audit_id": response.validation_id,
             "timestamp": response.timestamp.isoformat(),
-            "total_patterns": len(all_patterns),
+            "total_patterns": len(self.pattern_registry),
+            "audited_patterns": len(audited_patterns),
+            "registry_summary": registry_summary,
             "system_health": response.validation_summary.system_health.value,
             "coherence_metrics": asdict(response.system_coherence),
             "critical_actions": [
-                asdict(action)
+                _action_to_dict(action)
                 for action in response.actions_required
                 if action.priority == ValidationPriority.URGENT
             ],
@@ -330,68 +603,119 @@ class PatternValidator:
                 conflicting_classifications
             ),
             "resolution_actions": [
-                asdict(action) for action in response.actions_required
+                _action_to_dict(action) for action in response.actions_required
             ],
         }
 
     def _build_validation_context(self, request: PatternValidationRequest) -> str:
         """Build context string for AI validation"""
         context_parts = [
-            f"VALIDATION_REQUEST: {request.action.value}",
-            f"VALIDATION_ID: {request.validation_id}",
-            f"PATTERNS_COUNT: {len(request.patterns)}",
-            "",
+            _CONTEXT_HEADER_TEMPLATE.format(
+                action=request.action.value,
+                validation_id=request.validation_id,
+                count=len(request.patterns),
+            )
         ]
 
         # Add pattern details
-        for i, pattern in enumerate(request.patterns):
-            context_parts.extend(
-                [
-                    f"PATTERN_{i+1}:",
-                    f"  ID: {pattern.pattern_id}",
-                    f"  CATEGORY: {pattern.category}",
-                    f"  SUBCATEGORY: {pattern.subcategory}",
-                    f"  CONFIDENCE: {pattern.confidence}",
-                    f"  SOURCE_AGENT: {pattern.source_agent}",
-                    f"  TIMESTAMP: {pattern.timestamp.isoformat()}",
-                    "",
-                ]
+        context_parts.extend(
+            _PATTERN_TEMPLATE.format(
+                index=i, pattern=pattern, timestamp=pattern.timestamp.isoformat()
             )
+            for i, pattern in enumerate(request.patterns, 1)
+        )
 
         # Add system context
-        context_parts.extend(
-            [
-                "SYSTEM_METRICS:",
-                f"  Total Patterns: {len(self.pattern_registry)}",
-                f"  Active Conflicts: {len(self.conflict_registry)}",
-                f"  Average Consistency: {self.metrics['average_consistency_score']:.2f}",
-                f"  Average Quality: {self.metrics['average_quality_score']:.2f}",
-                "",
-            ]
+        context_parts.append(
+            _SYSTEM_METRICS_TEMPLATE.format(
+                total=len(self.pattern_registry),
+                conflicts=len(self.conflict_registry),
+                consistency=self.metrics["average_consistency_score"],
+                quality=self.metrics["average_quality_score"],
+            )
         )
 
         # Add request-specific context
         if request.context:
             context_parts.append("ADDITIONAL_CONTEXT:")
-            for key, value in request.context.items():
-                context_parts.append(f"  {key}: {value}")
+            context_parts.extend(
+                f"  {key}: {value}" for key, value in request.context.items()
+            )
             context_parts.append("")
 
         return "\n".join(context_parts)
 
-    async def _get_ai_validation(self, context: str) -> str:
+    async def _get_ai_validation(
+        self, context: str, cache_key: Optional[str] = None
+    ) -> str:
         """Get AI validation response"""
-        full_prompt = (
-            f"{self.prompt_template}\n\n{context}\n\nProvide validation analysis:"
-        )
+        if cache_key is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self.metrics["cache_hits"] += 1
+                return cached
+
+        full_prompt = context + self._prompt_suffix
+
+        if self._validation_semaphore is None:
+            self._validation_semaphore = asyncio.Semaphore(
+                self.max_concurrent_validations
+            )
 
         try:
-            response = await self.ollama_client.generate_response(prompt=full_prompt)
+            async with self._validation_semaphore:
+                # The template goes in as the system prompt, so every request
+                # starts with the same prefix and the client reuses its token
+                # ids when sizing the prompt against the context window
+                response = await self._stream_validation(full_prompt)
+
+            # Only genuine AI answers are cached, never the fallback
+            if cache_key is not None:
+                if len(self._response_cache) >= self.response_cache_size:
+                    self._response_cache.pop(next(iter(self._response_cache)))
+                self._response_cache[cache_key] = response
             return response
         except Exception as e:
-            logger.error(f"Error getting AI validation: {str(e)}")
+            logger.error("Error getting AI validation: %s", e)
             return self._create_fallback_validation()
 
+    async def _stream_validation(self, prompt: str) -> str:
+        """Stream the AI answer, stopping once its JSON document is complete"""
+        chunks: List[str] = []
+        scanner = _JsonDocumentScanner()
+        stream = self.ollama_client.stream_response(
+            prompt=prompt, system_prompt=self.prompt_template
+        )
+        try:
+            async for chunk in stream:
+                end = scanner.feed(chunk)
+                if end is not None:
+                    # Anything the model adds after the JSON is dropped
+                    chunks.append(chunk[:end])
+                    break
+                chunks.append(chunk)
+        finally:
+            # Closing the stream drops the connection so Ollama stops generating
+            await stream.aclose()
+
+        return "".join(chunks).strip()
+
+    def _validation_cache_key(self, requests: List[PatternValidationRequest]) -> str:
+        """Hash the parts of validation requests that determine the answer"""
+        # Validation ids and live metrics vary per call, so they are left out
+        digest = hashlib.blake2b(digest_size=16)
+        for request in requests:
+            digest.update(f"\x1d{request.action.value}".encode())
+            for pattern in request.patterns:
+                digest.update(
+                    f"\x1e{pattern.pattern_id}\x1f{pattern.category}"
+                    f"\x1f{pattern.subcategory}\x1f{pattern.confidence}"
+                    f"\x1f{pattern.source_agent}".encode()
+                )
+            if request.context:
+                digest.update(repr(request.context).encode())
+        return digest.hexdigest()
+
     def _process_validation_response(
         self,
         validation_id: str,
@@ -402,11 +726,45 @@ class PatternValidator:
         try:
             # Try to parse JSON response
             if ai_response.strip().startswith("{"):
-                response_data = json.loads(ai_response)
+                response_data = _json_loads(ai_response)
             else:
                 # Fallback parsing for non-JSON responses
                 response_data = self._parse_text_response(ai_response, patterns)
+        except Exception as e:
+            logger.error("Error processing validation response: %s", e)
+            return self._create_fallback_response(validation_id, patterns)
 
+        return self._build_validation_response(validation_id, response_data, patterns)
+
+    def _split_batch_response(
+        self, ai_response: str, count: int
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Split a batched AI response into per-request validation data"""
+        try:
+            response_data = _json_loads(ai_response)
+        except ValueError:
+            return [None] * count
+
+        if isinstance(response_data, dict):
+            # A single object (e.g. the fallback validation) applies to all
+            response_data = response_data.get("responses", [response_data] * count)
+
+        if (
+            isinstance(response_data, list)
+            and len(response_data) == count
+            and all(isinstance(item, dict) for item in response_data)
+        ):
+            return response_data
+        return [None] * count
+
+    def _build_validation_response(
+        self,
+        validation_id: str,
+        response_data: Dict[str, Any],
+        patterns: List[PatternClassification],
+    ) -> PatternValidationResponse:
+        """Build a structured validation response from parsed AI data"""
+        try:
             # Create structured response
             return PatternValidationResponse(
                 validation_id=validation_id,
@@ -424,7 +782,14 @@ class PatternValidator:
                     )
                 ),
                 actions_required=[
-                    ValidationAction(**action)
+                    ValidationAction(
+                        **{
+                            **action,
+                            "priority": _PRIORITY_MAP.get(
+                                action.get("priority"), ValidationPriority.NORMAL
+                            ),
+                        }
+                    )
                     for action in response_data.get("actions_required", [])
                 ],
                 validation_summary=ValidationSummary(
@@ -439,17 +804,17 @@ class PatternValidator:
                                 "system_health": "GOOD",
                             },
                         ),
-                        "system_health": SystemHealth(
+                        "system_health": _HEALTH_MAP[
                             response_data.get("validation_summary", {}).get(
                                 "system_health", "GOOD"
                             )
-                        ),
+                        ],
                     }
                 ),
             )
 
         except Exception as e:
-            logger.error(f"Error processing validation response: {str(e)}")
+            logger.error("Error processing validation response: %s", e)
             return self._create_fallback_response(validation_id, patterns)
 
     def _parse_text_response(
@@ -467,13 +832,7 @@ class PatternValidator:
                         "confidence": pattern.confidence,
                         "source_agent": pattern.source_agent,
                     },
-                    "validation_result": {
-                        "is_coherent": True,
-                        "consistency_score": 0.8,
-                        "quality_score": 0.8,
-                        "conflicts_detected": [],
-                        "recommendations": [],
-                    },
+                    "validation_result": _default_validation_result(),
                 }
                 for pattern in patterns
             ],
@@ -495,33 +854,44 @@ class PatternValidator:
 
     def _update_validation_state(self, response: PatternValidationResponse):
         """Update internal state based on validation response"""
-        # Update metrics
-        self.metrics["validations_performed"] += 1
-        self.metrics["average_consistency_score"] = (
-            self.metrics["average_consistency_score"]
-            * (self.metrics["validations_performed"] - 1)
-            + response.system_coherence.overall_consistency
-        ) / self.metrics["validations_performed"]
-        self.metrics["average_quality_score"] = (
-            self.metrics["average_quality_score"]
-            * (self.metrics["validations_performed"] - 1)
-            + response.system_coherence.quality_average
-        ) / self.metrics["validations_performed"]
-
-        # Update pattern registry
+        # Update metrics with incremental running means
+        metrics = self.metrics
+        metrics["validations_performed"] += 1
+        n = metrics["validations_performed"]
+        coherence = response.system_coherence
+        metrics["average_consistency_score"] += (
+            coherence.overall_consistency - metrics["average_consistency_score"]
+        ) / n
+        metrics["average_quality_score"] += (
+            coherence.quality_average - metrics["average_quality_score"]
+        ) / n
+
+        # Update pattern registry; new entries share the validation's timestamp
+        registry = self.pattern_registry
         for pattern_data in response.patterns_analyzed:
             pattern_id = pattern_data["pattern_id"]
-            if pattern_id not in self.pattern_registry:
+            if pattern_id not in registry:
                 # Create pattern classification from response data
                 classification_data = pattern_data["current_classification"]
-                self.pattern_registry[pattern_id] = PatternClassification(
+                pattern = PatternClassification(
                     pattern_id=pattern_id,
                     category=classification_data["category"],
                     subcategory=classification_data["subcategory"],
                     confidence=classification_data["confidence"],
                     source_agent=classification_data["source_agent"],
-                    timestamp=datetime.now(),
+                    timestamp=response.timestamp,
                 )
+                registry[pattern_id] = pattern
+                self._category_counts[pattern.category] += 1
+                self._confidence_sum += pattern.confidence
+
+    def _get_registry_summary(self) -> Dict[str, Any]:
+        """Summarize the pattern registry from its running aggregates"""
+        total = len(self.pattern_registry)
+        return {
+            "category_counts": dict(self._category_counts),
+            "average_confidence": self._confidence_sum / total if total else 0.0,
+        }
 
     def _get_consensus_classification(
         self, classifications: List[PatternClassification]
@@ -530,61 +900,29 @@ class PatternValidator:
         if not classifications:
             return {}
 
-        # Simple majority vote for category
-        categories = [c.category for c in classifications]
-        consensus_category = max(set(categories), key=categories.count)
-
-        # Average confidence
-        avg_confidence = sum(c.confidence for c in classifications) / len(
-            classifications
-        )
+        # Simple majority vote for category, counted in a single pass
+        consensus_category, votes = Counter(
+            c.category for c in classifications
+        ).most_common(1)[0]
 
+        count = len(classifications)
         return {
             "category": consensus_category,
-            "confidence": avg_confidence,
-            "agent_count": len(classifications),
-            "agreement_level": categories.count(consensus_category) / len(categories),
+            "confidence": sum(c.confidence for c in classifications) / count,
+            "agent_count": count,
+            "agreement_level": votes / count,
         }
 
     def _generate_system_recommendations(
         self, response: PatternValidationResponse
     ) -> List[str]:
         """Generate system-level recommendations based on validation"""
-        recommendations = []
-
-        if response.system_coherence.overall_consistency < 0.7:
-            recommendations.append("Improve cross-agent classification consistency")
-
-        if response.system_coherence.quality_average < 0.8:
-            recommendations.append("Enhance pattern classification quality")
-
-        if response.system_coherence.conflict_count > 5:
-            recommendations.append("Address high number of classification conflicts")
-
-        return recommendations
+        coherence = response.system_coherence
+        return [message for check, message in _HEALTH_RULES if check(coherence)]
 
     def _create_fallback_validation(self) -> str:
         """Create fallback validation response"""
-        return json.dumps(
-            {
-                "validation_id": "fallback",
-                "patterns_analyzed": [],
-                "system_coherence": {
-                    "overall_consistency": 0.5,
-                    "conflict_count": 0,
-                    "quality_average": 0.5,
-                    "improvement_areas": ["ai_communication"],
-                },
-                "actions_required": [],
-                "validation_summary": {
-                    "total_patterns": 0,
-                    "coherent_patterns": 0,
-                    "conflicts_resolved": 0,
-                    "recommendations_made": 1,
-                    "system_health": "FAIR",
-                },
-            }
-        )
+        return _FALLBACK_VALIDATION_JSON
 
     def _create_fallback_response(
         self, validation_id: str, patterns: List[PatternClassification]
@@ -6,17 +6,85 @@ serving as the bridge between user intentions and system capabilities.
 """
 
 import asyncio
+import copy
+import hashlib
 import json
 import logging
+import string
 import time
+from collections import OrderedDict, deque
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Any, Union
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Any, Union
 from dataclasses import dataclass, asdict
 import re
 
+try:
+    import re2
+
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# A section header is a line holding only **NAME:**
+_SECTION_HEADER_RE = re.compile(r"^[^\S\n]*\*\*(.+):\*\*[^\S\n]*$", re.MULTILINE)
+
+# A field is a "- Name: value" line inside a section
+_FIELD_RE = re.compile(r"^[^A-Za-z\n]*([A-Za-z][A-Za-z ]*):(.*)$", re.MULTILINE)
+
+
+def _compile_union(patterns: List[str]) -> Any:
+    """Compile alternative patterns into one regex, on RE2 when available"""
+    union = "|".join(f"(?:{pattern})" for pattern in patterns)
+    if RE2_AVAILABLE:
+        # Linear-time matching, so user text can't trigger backtracking
+        try:
+            return re2.compile(union)
+        except Exception as e:
+            logger.warning(f"RE2 could not compile pattern, using re: {e}")
+    return re.compile(union)
+
+
+def _compile_template(template: str) -> Callable[[Dict[str, Any]], str]:
+    """Parse a str.format template once into a render function"""
+    pieces = list(string.Formatter().parse(template))
+    if any(
+        spec or conversion or (field is not None and not field.isidentifier())
+        for _, field, spec, conversion in pieces
+    ):
+        # Format specs, conversions and positional or indexed fields are
+        # left to str.format
+        return lambda context: template.format(**context)
+
+    pieces = [(literal, field) for literal, field, _, _ in pieces]
+
+    def render(context: Dict[str, Any]) -> str:
+        parts = []
+        for literal, field in pieces:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(context[field]))
+        return "".join(parts)
+
+    return render
+
+
+def _format_timestamp(timestamp_ns: Optional[int]) -> Optional[str]:
+    """Format a time.time_ns() timestamp as a local ISO 8601 string"""
+    if timestamp_ns is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+
+def _parse_fields(content: str) -> Dict[str, str]:
+    """Map each field name in a response section to its stripped value"""
+    return {
+        match.group(1): match.group(2).strip() for match in _FIELD_RE.finditer(content)
+    }
+
 
 class CommandType(Enum):
     """Types of user commands"""
@@ -68,6 +136,14 @@ class ValidationStatus(Enum):
     UNSAFE = "unsafe"
 
 
+# Value-to-member lookups for enums parsed out of AI responses
+_COMMAND_TYPE_MAP = {member.value: member for member in CommandType}
+_COMPLEXITY_MAP = {member.value: member for member in ComplexityLevel}
+_RISK_MAP = {member.value: member for member in RiskLevel}
+_ACTION_TYPE_MAP = {member.value: member for member in ActionType}
+_VALIDATION_STATUS_MAP = {member.value: member for member in ValidationStatus}
+
+
 @dataclass
 class IntentAnalysis:
     """Analysis of user intent"""
@@ -125,11 +201,13 @@ class SystemAction:
     justification: str
     user_feedback: str
     next_steps: List[str]
-    created_at: datetime
-    executed_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
+    # Timestamps are time.time_ns() values, formatted only when reported
+    created_at: int
+    executed_at: Optional[int] = None
+    completed_at: Optional[int] = None
     status: str = "pending"
     results: Optional[Dict[str, Any]] = None
+    user_command: str = ""
 
 
 class SystemController:
@@ -143,11 +221,18 @@ class SystemController:
     def __init__(self, central_brain):
         """Initialize the System Controller"""
         self.central_brain = central_brain
-        self.action_history: List[SystemAction] = []
+        # Recent actions only; the oldest entries drop off automatically
+        self.max_action_history = 1000
+        self.action_history: Deque[SystemAction] = deque(maxlen=self.max_action_history)
         self.active_actions: Dict[str, SystemAction] = {}
         self.security_level = "standard"  # standard, elevated, restricted
         self.action_counter = 0
 
+        # LRU of parsed translations, keyed on command, context and security
+        # level, so repeated phrasings skip the model call
+        self.translate_cache_size = 128
+        self._translate_cache: "OrderedDict[tuple, SystemAction]" = OrderedDict()
+
         # Command pattern recognition
         self.command_patterns = {
             CommandType.QUERY: [
@@ -226,14 +311,70 @@ class SystemController:
             r"change\s+config",
         ]
 
+        # High-risk patterns compiled once into a single alternation, so the
+        # safety check is one search instead of one per pattern
+        self._high_risk_re = _compile_union(self.high_risk_patterns)
+
+        # Static part of get_system_capabilities
+        self._capabilities_template: Dict[str, Any] = {
+            "agent_management": {
+                "can_create_agents": True,
+                "can_modify_agents": True,
+                "can_remove_agents": True,
+                "max_agents": 50,
+            },
+            "system_control": {
+                "can_start_processes": True,
+                "can_stop_processes": True,
+                "can_modify_config": True,
+            },
+            "data_operations": {
+                "can_query_data": True,
+                "can_modify_data": True,
+                "can_export_data": True,
+            },
+            "integration": {
+                "available_apis": ["ollama", "system", "file_system"],
+                "external_services": [],
+            },
+        }
+
+        # Load prompt template once and pre-parse its fields, so each
+        # command only fills in the context values
+        self.reload_prompt()
+
         logger.info("SystemController initialized")
 
+    def _load_prompt_template(self) -> Optional[str]:
+        """Load the system control prompt template"""
+        try:
+            with open("app/ai/prompts/system_control.txt", "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            logger.error("System control prompt template not found")
+            return None
+
+    def reload_prompt(self):
+        """Re-read the system control prompt template from disk"""
+        self._prompt_template = self._load_prompt_template()
+        self._render_prompt = (
+            _compile_template(self._prompt_template)
+            if self._prompt_template is not None
+            else None
+        )
+        self.clear_cache()
+
     async def translate_user_command(
         self, user_command: str, user_context: Dict[str, Any] = None
     ) -> SystemAction:
         """
         Translate natural language command into structured system action.
 
+        Translations are cached per exact command, user context and security
+        level. A cached result is reused without rebuilding the analysis
+        context, so it does not reflect recent actions or system state that
+        changed since it was first translated.
+
         Args:
             user_command: Natural language command from user
             user_context: Additional context about user and system state
@@ -248,6 +389,21 @@ class SystemController:
             self.action_counter += 1
             action_id = f"action_{self.action_counter:04d}"
 
+            # Reuse a previous translation of the same command
+            cache_key = self._translation_cache_key(user_command, user_context or {})
+            cached = self._translate_cache.get(cache_key)
+            if cached is not None:
+                self._translate_cache.move_to_end(cache_key)
+                system_action = copy.deepcopy(cached)
+                system_action.action_id = action_id
+                system_action.created_at = time.time_ns()
+                system_action.user_command = user_command
+
+                self._track_action(system_action)
+
+                logger.info(f"Command translated from cache: {action_id}")
+                return system_action
+
             # Build context for AI analysis
             context = await self._build_analysis_context(
                 user_command, user_context or {}
@@ -261,9 +417,16 @@ class SystemController:
                 action_id, user_command, ai_response
             )
 
+            # Only cache answers the model actually gave and that parsed
+            if system_action.action_id == action_id and (
+                ai_response != self._create_fallback_analysis(user_command)
+            ):
+                self._translate_cache[cache_key] = copy.deepcopy(system_action)
+                if len(self._translate_cache) > self.translate_cache_size:
+                    self._translate_cache.popitem(last=False)
+
             # Store action for tracking
-            self.active_actions[action_id] = system_action
-            self.action_history.append(system_action)
+            self._track_action(system_action)
 
             logger.info(f"Command translated successfully: {action_id}")
             return system_action
@@ -273,6 +436,10 @@ class SystemController:
             # Return safe fallback action
             return await self._create_fallback_action(user_command, str(e))
 
+    def clear_cache(self):
+        """Drop all cached command translations"""
+        self._translate_cache.clear()
+
     async def execute_system_action(self, action: SystemAction) -> Dict[str, Any]:
         """
         Execute a validated system action safely.
@@ -287,7 +454,7 @@ class SystemController:
             logger.info(f"Executing system action: {action.action_id}")
 
             # Update action status
-            action.executed_at = datetime.now()
+            action.executed_at = time.time_ns()
             action.status = "executing"
 
             # Validate action is safe to execute
@@ -313,7 +480,7 @@ class SystemController:
 
             # Update action with results
             action.results = results
-            action.completed_at = datetime.now()
+            action.completed_at = time.time_ns()
             action.status = "completed" if results.get("success") else "failed"
 
             logger.info(f"Action execution completed: {action.action_id}")
@@ -346,10 +513,10 @@ class SystemController:
 
             # Check for high-risk patterns in original command
             command_lower = action.intent_analysis.primary_goal.lower()
-            for pattern in self.high_risk_patterns:
-                if re.search(pattern, command_lower):
-                    logger.warning(f"High-risk pattern detected: {pattern}")
-                    return False
+            match = self._high_risk_re.search(command_lower)
+            if match:
+                logger.warning(f"High-risk pattern detected: {match.group()}")
+                return False
 
             # Validate required permissions
             if not await self._check_user_permissions(
@@ -378,41 +545,44 @@ class SystemController:
         return {
             "action_id": action_id,
             "status": action.status,
-            "created_at": action.created_at.isoformat(),
-            "executed_at": (
-                action.executed_at.isoformat() if action.executed_at else None
-            ),
-            "completed_at": (
-                action.completed_at.isoformat() if action.completed_at else None
-            ),
+            "created_at": _format_timestamp(action.created_at),
+            "executed_at": _format_timestamp(action.executed_at),
+            "completed_at": _format_timestamp(action.completed_at),
             "results": action.results,
         }
 
     async def get_system_capabilities(self) -> Dict[str, Any]:
         """Get current system capabilities"""
-        return {
-            "agent_management": {
-                "can_create_agents": True,
-                "can_modify_agents": True,
-                "can_remove_agents": True,
-                "max_agents": 50,
-            },
-            "system_control": {
-                "can_start_processes": True,
-                "can_stop_processes": True,
-                "can_modify_config": True,
-                "security_level": self.security_level,
-            },
-            "data_operations": {
-                "can_query_data": True,
-                "can_modify_data": True,
-                "can_export_data": True,
-            },
-            "integration": {
-                "available_apis": ["ollama", "system", "file_system"],
-                "external_services": [],
-            },
-        }
+        # Deep copy so callers can't mutate the template's nested values
+        capabilities = copy.deepcopy(self._capabilities_template)
+        capabilities["system_control"]["security_level"] = self.security_level
+        return capabilities
+
+    def _track_action(self, action: SystemAction):
+        """Record a new action, pruning the active table once it is full"""
+        self.active_actions[action.action_id] = action
+        self.action_history.append(action)
+
+        if len(self.active_actions) > self.max_action_history:
+            # Finished actions go first, then the oldest never-executed ones
+            for action_id in [
+                action_id
+                for action_id, tracked in self.active_actions.items()
+                if tracked.status in ("completed", "failed")
+            ]:
+                del self.active_actions[action_id]
+            while len(self.active_actions) > self.max_action_history:
+                del self.active_actions[next(iter(self.active_actions))]
+
+    def _translation_cache_key(
+        self, user_command: str, user_context: Dict[str, Any]
+    ) -> tuple:
+        """Build the translation cache key for a command and its context"""
+        context_hash = hashlib.blake2b(
+            json.dumps(user_context, sort_keys=True, default=str).encode(),
+            digest_size=16,
+        ).digest()
+        return (user_command.strip(), context_hash, self.security_level)
 
     async def _build_analysis_context(
         self, user_command: str, user_context: Dict[str, Any]
@@ -421,6 +591,10 @@ class SystemController:
         system_state = await self._get_system_state()
         capabilities = await self.get_system_capabilities()
 
+        # Last 5 actions, walked back from the newest
+        recent_actions = list(islice(reversed(self.action_history), 5))
+        recent_actions.reverse()
+
         return {
             "user_command": user_command,
             "user_context": user_context,
@@ -433,20 +607,18 @@ class SystemController:
                     "type": action.intent_analysis.command_type.value,
                     "status": action.status,
                 }
-                for action in self.action_history[-5:]  # Last 5 actions
+                for action in recent_actions
             ],
         }
 
     async def _get_ai_analysis(self, context: Dict[str, Any]) -> str:
         """Get AI analysis of the command"""
         try:
-            # Load system control prompt
-            prompt_path = "app/ai/prompts/system_control.txt"
-            with open(prompt_path, "r") as f:
-                prompt_template = f.read()
+            if self._render_prompt is None:
+                return self._create_fallback_analysis(context["user_command"])
 
             # Format prompt with context
-            formatted_prompt = prompt_template.format(**context)
+            formatted_prompt = self._render_prompt(context)
 
             # Get AI response
             response = await self.central_brain.ollama_client.generate_response(
@@ -502,7 +674,8 @@ class SystemController:
                 justification=justification,
                 user_feedback=user_feedback,
                 next_steps=next_steps,
-                created_at=datetime.now(),
+                created_at=time.time_ns(),
+                user_command=user_command,
             )
 
         except Exception as e:
@@ -511,60 +684,35 @@ class SystemController:
 
     def _extract_response_sections(self, response: str) -> Dict[str, str]:
         """Extract structured sections from AI response"""
-        sections = {}
-        current_section = None
-        current_content = []
+        headers = list(_SECTION_HEADER_RE.finditer(response))
+        ends = [header.start() for header in headers[1:]] + [len(response)]
+        return {
+            header.group(1): response[header.end() : end].strip()
+            for header, end in zip(headers, ends)
+        }
 
-        for line in response.split("\n"):
-            line = line.strip()
-            if line.startswith("**") and line.endswith(":**"):
-                # Save previous section
-                if current_section:
-                    sections[current_section] = "\n".join(current_content).strip()
+    def _parse_intent_analysis(self, content: str) -> IntentAnalysis:
+        """Parse intent analysis section"""
+        try:
+            fields = _parse_fields(content)
 
-                # Start new section
-                current_section = line[2:-3]  # Remove ** and :**
-                current_content = []
-            elif current_section:
-                current_content.append(line)
+            primary_goal = fields.get("Primary goal", "")
 
-        # Save last section
-        if current_section:
-            sections[current_section] = "\n".join(current_content).strip()
+            type_str = fields.get("Command type", "").lower()
+            command_type = _COMMAND_TYPE_MAP.get(type_str, CommandType.QUERY)
 
-        return sections
+            complexity_str = fields.get("Complexity level", "").lower()
+            complexity_level = _COMPLEXITY_MAP.get(
+                complexity_str, ComplexityLevel.SIMPLE
+            )
 
-    def _parse_intent_analysis(self, content: str) -> IntentAnalysis:
-        """Parse intent analysis section"""
-        try:
-            lines = content.split("\n")
-            primary_goal = ""
-            command_type = CommandType.QUERY
-            complexity_level = ComplexityLevel.SIMPLE
-            parameters = {}
-
-            for line in lines:
-                if "Primary goal:" in line:
-                    primary_goal = line.split(":", 1)[1].strip()
-                elif "Command type:" in line:
-                    type_str = line.split(":", 1)[1].strip().lower()
-                    command_type = (
-                        CommandType(type_str)
-                        if type_str in [t.value for t in CommandType]
-                        else CommandType.QUERY
-                    )
-                elif "Complexity level:" in line:
-                    complexity_str = line.split(":", 1)[1].strip().lower()
-                    complexity_level = (
-                        ComplexityLevel(complexity_str)
-                        if complexity_str in [c.value for c in ComplexityLevel]
-                        else ComplexityLevel.SIMPLE
-                    )
-                elif "Parameters extracted:" in line:
-                    params_str = line.split(":", 1)[1].strip()
-                    # Simple parameter extraction
-                    if params_str and params_str != "None":
-                        parameters = {"raw_params": params_str}
+            # Simple parameter extraction
+            params_str = fields.get("Parameters extracted", "")
+            parameters = (
+                {"raw_params": params_str}
+                if params_str and params_str != "None"
+                else {}
+            )
 
             return IntentAnalysis(
                 primary_goal=primary_goal or "Unknown goal",
@@ -587,31 +735,27 @@ class SystemController:
     def _parse_capability_assessment(self, content: str) -> CapabilityAssessment:
         """Parse capability assessment section"""
         try:
-            lines = content.split("\n")
-            required_capabilities = []
+            fields = _parse_fields(content)
             available_resources = {}
+
+            caps_str = fields.get("Required capabilities", "")
+            required_capabilities = [
+                cap.strip() for cap in caps_str.split(",") if cap.strip()
+            ]
+
             feasibility_score = 5
-            required_agents = []
+            if "Feasibility score" in fields:
+                try:
+                    feasibility_score = int(
+                        re.search(r"\d+", fields["Feasibility score"]).group()
+                    )
+                except:
+                    feasibility_score = 5
 
-            for line in lines:
-                if "Required capabilities:" in line:
-                    caps_str = line.split(":", 1)[1].strip()
-                    required_capabilities = [
-                        cap.strip() for cap in caps_str.split(",") if cap.strip()
-                    ]
-                elif "Feasibility score:" in line:
-                    score_str = line.split(":", 1)[1].strip()
-                    try:
-                        feasibility_score = int(re.search(r"\d+", score_str).group())
-                    except:
-                        feasibility_score = 5
-                elif "Required agents:" in line:
-                    agents_str = line.split(":", 1)[1].strip()
-                    required_agents = [
-                        agent.strip()
-                        for agent in agents_str.split(",")
-                        if agent.strip()
-                    ]
+            agents_str = fields.get("Required agents", "")
+            required_agents = [
+                agent.strip() for agent in agents_str.split(",") if agent.strip()
+            ]
 
             return CapabilityAssessment(
                 required_capabilities=required_capabilities,
@@ -634,34 +778,24 @@ class SystemController:
     def _parse_safety_validation(self, content: str) -> SafetyValidation:
         """Parse safety validation section"""
         try:
-            lines = content.split("\n")
-            risk_level = RiskLevel.LOW
-            safety_concerns = []
+            fields = _parse_fields(content)
             permission_requirements = []
-            validation_status = ValidationStatus.SAFE
             warnings = []
 
-            for line in lines:
-                if "Risk level:" in line:
-                    risk_str = line.split(":", 1)[1].strip().lower()
-                    risk_level = (
-                        RiskLevel(risk_str)
-                        if risk_str in [r.value for r in RiskLevel]
-                        else RiskLevel.LOW
-                    )
-                elif "Safety concerns:" in line:
-                    concerns_str = line.split(":", 1)[1].strip()
-                    if concerns_str and concerns_str != "None":
-                        safety_concerns = [
-                            concern.strip() for concern in concerns_str.split(",")
-                        ]
-                elif "Validation status:" in line:
-                    status_str = line.split(":", 1)[1].strip().lower()
-                    validation_status = (
-                        ValidationStatus(status_str)
-                        if status_str in [v.value for v in ValidationStatus]
-                        else ValidationStatus.SAFE
-                    )
+            risk_str = fields.get("Risk level", "").lower()
+            risk_level = _RISK_MAP.get(risk_str, RiskLevel.LOW)
+
+            concerns_str = fields.get("Safety concerns", "")
+            safety_concerns = (
+                [concern.strip() for concern in concerns_str.split(",")]
+                if concerns_str and concerns_str != "None"
+                else []
+            )
+
+            status_str = fields.get("Validation status", "").lower()
+            validation_status = _VALIDATION_STATUS_MAP.get(
+                status_str, ValidationStatus.SAFE
+            )
 
             return SafetyValidation(
                 risk_level=risk_level,
@@ -684,33 +818,31 @@ class SystemController:
     def _parse_action_plan(self, content: str) -> ActionPlan:
         """Parse action plan section"""
         try:
-            lines = content.split("\n")
-            execution_steps = []
-            estimated_duration = 5.0
-            success_criteria = []
+            fields = _parse_fields(content)
             rollback_plan = []
 
-            for line in lines:
-                if "Execution steps:" in line:
-                    steps_str = line.split(":", 1)[1].strip()
-                    if steps_str:
-                        execution_steps = [
-                            {"step": step.strip()} for step in steps_str.split(",")
-                        ]
-                elif "Estimated duration:" in line:
-                    duration_str = line.split(":", 1)[1].strip()
-                    try:
-                        estimated_duration = float(
-                            re.search(r"[\d.]+", duration_str).group()
-                        )
-                    except:
-                        estimated_duration = 5.0
-                elif "Success criteria:" in line:
-                    criteria_str = line.split(":", 1)[1].strip()
-                    if criteria_str:
-                        success_criteria = [
-                            criterion.strip() for criterion in criteria_str.split(",")
-                        ]
+            steps_str = fields.get("Execution steps", "")
+            execution_steps = (
+                [{"step": step.strip()} for step in steps_str.split(",")]
+                if steps_str
+                else []
+            )
+
+            estimated_duration = 5.0
+            if "Estimated duration" in fields:
+                try:
+                    estimated_duration = float(
+                        re.search(r"[\d.]+", fields["Estimated duration"]).group()
+                    )
+                except:
+                    estimated_duration = 5.0
+
+            criteria_str = fields.get("Success criteria", "")
+            success_criteria = (
+                [criterion.strip() for criterion in criteria_str.split(",")]
+                if criteria_str
+                else []
+            )
 
             return ActionPlan(
                 execution_steps=execution_steps,
@@ -733,28 +865,20 @@ class SystemController:
     def _parse_recommended_action(self, content: str) -> tuple:
         """Parse recommended action section"""
         try:
-            lines = content.split("\n")
-            action_type = ActionType.REQUEST_CLARIFICATION
-            justification = ""
-            user_feedback = ""
-            next_steps = []
-
-            for line in lines:
-                if "Action type:" in line:
-                    type_str = line.split(":", 1)[1].strip().lower()
-                    action_type = (
-                        ActionType(type_str)
-                        if type_str in [a.value for a in ActionType]
-                        else ActionType.REQUEST_CLARIFICATION
-                    )
-                elif "Justification:" in line:
-                    justification = line.split(":", 1)[1].strip()
-                elif "User feedback:" in line:
-                    user_feedback = line.split(":", 1)[1].strip()
-                elif "Next steps:" in line:
-                    steps_str = line.split(":", 1)[1].strip()
-                    if steps_str:
-                        next_steps = [step.strip() for step in steps_str.split(",")]
+            fields = _parse_fields(content)
+
+            type_str = fields.get("Action type", "").lower()
+            action_type = _ACTION_TYPE_MAP.get(
+                type_str, ActionType.REQUEST_CLARIFICATION
+            )
+
+            justification = fields.get("Justification", "")
+            user_feedback = fields.get("User feedback", "")
+
+            steps_str = fields.get("Next steps", "")
+            next_steps = (
+                [step.strip() for step in steps_str.split(",")] if steps_str else []
+            )
 
             return action_type, justification, user_feedback, next_steps
 
@@ -842,7 +966,8 @@ class SystemController:
             justification="Fallback response for error condition",
             user_feedback=f"I encountered an issue processing your request: {error}",
             next_steps=["Provide fallback response"],
-            created_at=datetime.now(),
+            created_at=time.time_ns(),
+            user_command=user_command,
         )
 
     async def _get_system_state(self) -> Dict[str, Any]:
@@ -21,6 +21,7 @@ import uvicorn
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from app.ai.central_brain import CentralAIBrain, create_central_brain
+from app.ai.ollama_client import install_uvloop
 from app.core.central_integration import CentralIntegration
 from app.core.conversation_memory import conversation_memory
 from app.core.multimodal_processor import multimodal_processor
@@ -1151,6 +1152,7 @@ async def decide_code_execution(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    install_uvloop()
     uvicorn.run(
         "app.web.ai_api_server:app",
         host="127.0.0.1",